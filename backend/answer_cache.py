@@ -0,0 +1,142 @@
+# answer_cache.py
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Openers and words that point back into the conversation ("and the second dataset?",
+# "what about its accuracy?"); questions using them are not answered from the cache
+_FOLLOW_UP_OPENERS = ("and", "but", "also", "then", "what about", "how about")
+_BACK_REFERENCES = {
+    "it", "its", "they", "them", "their", "he", "she", "him", "her", "his",
+    "this", "that", "these", "those", "above", "previous", "previously", "earlier",
+    "again", "else", "former", "latter",
+}
+# "this paper" and the like refer to the paper, not to the conversation
+_PAPER_NOUNS = {"paper", "study", "work", "article", "document", "pdf"}
+
+
+def is_standalone(question: str) -> bool:
+    """Whether ``question`` reads the same without the conversation before it.
+
+    A conservative word-level check: short questions, follow-up openers and pronouns
+    or demonstratives that refer back all count as depending on the history.
+    """
+    words = re.findall(r"[a-z]+", question.lower())
+    if len(words) < 3:
+        return False
+    text = " ".join(words)
+    if any(text.startswith(opener + " ") for opener in _FOLLOW_UP_OPENERS):
+        return False
+    for word, following in zip(words, words[1:] + [""]):
+        if word in _BACK_REFERENCES and following not in _PAPER_NOUNS:
+            return False
+    return True
+
+
+class SemanticAnswerCache:
+    """Answers keyed by question embedding, one namespace per paper.
+
+    A question whose embedding has cosine similarity of at least ``threshold`` with an
+    earlier question on the same paper gets the earlier answer and sources back without
+    running the QA chain. Entries expire after ``ttl_seconds`` and the least recently
+    used one is dropped once ``max_entries`` are held across all papers.
+    """
+
+    def __init__(self, threshold: float = 0.92, ttl_seconds: Optional[float] = 86400, max_entries: int = 2000):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # (paper_key, entry_id) -> entry, in least-recently-used order
+        self._entries: "OrderedDict[tuple, Dict]" = OrderedDict()
+        self._by_paper: Dict[str, Dict[int, Dict]] = {}
+        self._next_id = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def lookup(self, paper_key: str, query_vector: List[float]) -> Optional[Dict]:
+        """Best cached entry for this paper at or above the threshold, or None."""
+        query = _normalize(query_vector)
+        with self._lock:
+            self._expire(paper_key)
+            entries = list(self._by_paper.get(paper_key, {}).values())
+            best = None
+            if entries:
+                scores = np.stack([entry["vector"] for entry in entries]) @ query
+                i = int(np.argmax(scores))
+                if scores[i] >= self.threshold:
+                    best = {**entries[i], "score": float(scores[i])}
+            if best is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end((paper_key, best["id"]))
+            return best
+
+    def store(self, paper_key: str, question: str, query_vector: List[float],
+              answer: str, sources: Dict[int, str]):
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            entry = {
+                "id": entry_id,
+                "question": question,
+                "vector": _normalize(query_vector),
+                "answer": answer,
+                "sources": dict(sources),
+                "created_at": time.time()
+            }
+            self._entries[(paper_key, entry_id)] = entry
+            self._by_paper.setdefault(paper_key, {})[entry_id] = entry
+            while len(self._entries) > self.max_entries:
+                self._remove(*next(iter(self._entries)))
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "papers": len(self._by_paper),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "threshold": self.threshold
+            }
+
+    def _expire(self, paper_key: str):
+        if not self.ttl_seconds:
+            return
+        cutoff = time.time() - self.ttl_seconds
+        expired = [
+            entry_id for entry_id, entry in self._by_paper.get(paper_key, {}).items()
+            if entry["created_at"] < cutoff
+        ]
+        for entry_id in expired:
+            self._remove(paper_key, entry_id)
+        self.expirations += len(expired)
+
+    def _remove(self, paper_key: str, entry_id: int):
+        self._entries.pop((paper_key, entry_id), None)
+        paper_entries = self._by_paper.get(paper_key)
+        if paper_entries is not None:
+            paper_entries.pop(entry_id, None)
+            if not paper_entries:
+                del self._by_paper[paper_key]
+
+
+def _normalize(vector: List[float]) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
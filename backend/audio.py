@@ -0,0 +1,81 @@
+# audio.py
+import logging
+import os
+import subprocess
+import tempfile
+import time
+from typing import Dict
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Whisper models expect 16 kHz mono input
+SAMPLE_RATE = 16000
+
+READ_CHUNK_BYTES = 1 << 20
+
+
+def decode_to_pcm(path: str) -> np.ndarray:
+    """Decode any ffmpeg-readable file straight to 16 kHz mono float32 PCM, as Whisper expects."""
+    cmd = [
+        "ffmpeg", "-nostdin", "-loglevel", "error", "-threads", "0",
+        "-i", path,
+        "-f", "f32le", "-ac", "1", "-ar", str(SAMPLE_RATE),
+        "-"
+    ]
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    # Read into a bytearray so the resulting array is writable without an extra copy
+    buffer = bytearray()
+    while True:
+        chunk = process.stdout.read(READ_CHUNK_BYTES)
+        if not chunk:
+            break
+        buffer.extend(chunk)
+    stderr = process.stderr.read()
+    if process.wait() != 0:
+        raise RuntimeError(f"Failed to decode audio: {stderr.decode(errors='replace').strip()}")
+    return np.frombuffer(buffer, dtype=np.float32)
+
+
+def acquire_audio(youtube_url: str) -> Dict:
+    """Download the best native audio stream once, decode it to PCM in memory and clean up.
+
+    Returns the PCM samples along with the bytes downloaded and the time spent per step.
+    """
+    import yt_dlp
+
+    with tempfile.TemporaryDirectory(prefix="edutranscribe-audio-") as temp_dir:
+        ydl_opts = {
+            'format': 'bestaudio/best',
+            'outtmpl': os.path.join(temp_dir, "%(id)s.%(ext)s"),
+            'quiet': True,
+        }
+
+        start = time.perf_counter()
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            info = ydl.extract_info(youtube_url, download=True)
+            downloads = info.get("requested_downloads") or [{}]
+            audio_path = downloads[0].get("filepath") or ydl.prepare_filename(info)
+        download_seconds = time.perf_counter() - start
+
+        if not os.path.exists(audio_path):
+            logger.error(f"No audio file found in {temp_dir} after download")
+            raise FileNotFoundError(f"No audio file found in {temp_dir} after download")
+        bytes_downloaded = os.path.getsize(audio_path)
+
+        start = time.perf_counter()
+        audio = decode_to_pcm(audio_path)
+        decode_seconds = time.perf_counter() - start
+
+    stats = {
+        "bytes_downloaded": bytes_downloaded,
+        "download_seconds": round(download_seconds, 3),
+        "decode_seconds": round(decode_seconds, 3),
+        "duration_seconds": round(len(audio) / SAMPLE_RATE, 2)
+    }
+    logger.info(
+        f"Acquired {stats['duration_seconds']}s of audio: {bytes_downloaded} bytes downloaded in "
+        f"{stats['download_seconds']}s, decoded in {stats['decode_seconds']}s"
+    )
+    return {"audio": audio, "stats": stats}
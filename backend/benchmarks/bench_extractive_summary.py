@@ -0,0 +1,90 @@
+# bench_extractive_summary.py
+"""Compare the old dict-based extractive summarizer with the sparse-matrix one.
+
+Synthetic lecture transcripts of increasing length are summarized with the old
+implementation (three word_tokenize passes per sentence), the vectorized frequency
+scorer and TextRank. Run from the backend directory:
+    python -m benchmarks.bench_extractive_summary [--sizes 500 2000 8000]
+"""
+import argparse
+import random
+import string
+import time
+from collections import Counter
+
+import nltk
+from nltk.corpus import stopwords
+from nltk.tokenize import sent_tokenize
+
+from extractive import extractive_summary
+
+TOPIC_WORDS = (
+    "gradient descent learning rate loss function neural network layer activation weight bias "
+    "training validation overfitting regularization dropout batch normalization convolution "
+    "kernel stride pooling attention transformer embedding token sequence recurrent memory"
+).split()
+FILLER_WORDS = "so now we will look at how this works and then you can see that it is the case".split()
+
+
+def make_transcript(sentence_count: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    sentences = []
+    for _ in range(sentence_count):
+        words = rng.choices(FILLER_WORDS, k=rng.randint(6, 12)) + rng.choices(TOPIC_WORDS, k=rng.randint(2, 6))
+        rng.shuffle(words)
+        sentences.append(" ".join(words).capitalize() + ".")
+    return " ".join(sentences)
+
+
+def legacy_summary(text, num_sentences=15):
+    # The summarizer as it was before the sparse rewrite, kept here for comparison
+    sentences = sent_tokenize(text)
+    if len(sentences) <= num_sentences:
+        return "\n\n".join(sentences)
+    stop_words = set(stopwords.words('english'))
+    word_frequencies = Counter()
+    for sentence in sentences:
+        for word in nltk.word_tokenize(sentence.lower()):
+            if word not in stop_words and word not in string.punctuation:
+                word_frequencies[word] += 1
+    max_frequency = max(word_frequencies.values()) if word_frequencies else 1
+    normalized_frequencies = {word: freq/max_frequency for word, freq in word_frequencies.items()}
+    sentence_scores = {}
+    for i, sentence in enumerate(sentences):
+        score = 0
+        for word in nltk.word_tokenize(sentence.lower()):
+            if word in normalized_frequencies:
+                score += normalized_frequencies[word]
+        sentence_scores[i] = score / max(1, len(nltk.word_tokenize(sentence)))
+    top_indices = sorted(sentence_scores, key=sentence_scores.get, reverse=True)[:num_sentences]
+    top_indices.sort()
+    return "\n\n".join(f"• {sentences[i].strip()}" for i in top_indices if sentences[i].strip())
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    fn(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 2000, 8000],
+                        help="Transcript lengths in sentences (a 3-hour lecture is roughly 3000)")
+    parser.add_argument("--sentences", type=int, default=15, help="Sentences in each summary")
+    args = parser.parse_args()
+
+    print(f"{'sentences':>10} {'words':>9} {'legacy':>9} {'frequency':>10} {'textrank':>9} {'speedup':>8}")
+    for size in args.sizes:
+        text = make_transcript(size)
+        # Warm NLTK's lazily loaded tokenizer and stop word list outside the timings
+        extractive_summary(make_transcript(20), 5)
+        old = timed(legacy_summary, text, args.sentences)
+        frequency = timed(extractive_summary, text, args.sentences, method="frequency")
+        textrank = timed(extractive_summary, text, args.sentences, method="textrank")
+        print(f"{size:>10} {len(text.split()):>9} {old:>8.2f}s {frequency:>9.2f}s {textrank:>8.2f}s "
+              f"{old / frequency:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# bench_nllb_batching.py
+"""Measure NLLB translation throughput (sentences/sec on CPU) for several batch sizes.
+
+Run from the backend directory:
+    python -m benchmarks.bench_nllb_batching --sentences 200 --batch-sizes 1 8 16 32
+"""
+import argparse
+import random
+import time
+
+import torch
+from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+
+from translation import translate_batched
+
+SAMPLE_SENTENCES = [
+    "Welcome back to the course.",
+    "Today we will look at how gradient descent finds the minimum of a loss function.",
+    "The learning rate controls how large each step is.",
+    "If it is too large, the optimisation can diverge.",
+    "Let us work through an example on the board.",
+    "A matrix is invertible only if its determinant is not zero.",
+    "Photosynthesis converts light energy into chemical energy stored in glucose.",
+    "Remember that the assignment is due at the end of next week, and late submissions lose ten percent per day.",
+    "Questions?",
+    "In the next lecture we will compare recursive and iterative implementations of the same algorithm.",
+]
+
+
+def make_sentences(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    return [rng.choice(SAMPLE_SENTENCES) for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="facebook/nllb-200-distilled-600M")
+    parser.add_argument("--target", default="hin_Deva", help="NLLB target language code")
+    parser.add_argument("--sentences", type=int, default=200)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 16, 32])
+    parser.add_argument("--threads", type=int, default=None, help="torch CPU threads")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    tokenizer = AutoTokenizer.from_pretrained(args.model)
+    model = AutoModelForSeq2SeqLM.from_pretrained(args.model)
+    model.eval()
+    sentences = make_sentences(args.sentences)
+
+    # Warm-up so one-off allocations are not billed to the first batch size
+    translate_batched(tokenizer, model, sentences[:4], args.target, batch_size=4)
+
+    for batch_size in args.batch_sizes:
+        start = time.perf_counter()
+        translate_batched(tokenizer, model, sentences, args.target, batch_size=batch_size)
+        elapsed = time.perf_counter() - start
+        print(f"batch_size={batch_size:<3} {elapsed:8.2f}s  {len(sentences) / elapsed:8.2f} sentences/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# bench_pdf_ingestion.py
+"""Compare the old PyPDF ingestion (parsed three times per paper) with single-pass PyMuPDF.
+
+Without a PDF argument a synthetic 300-page thesis is generated first.
+Run from the backend directory:
+    python -m benchmarks.bench_pdf_ingestion [thesis.pdf]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from pdf_ingest import extract_pages, full_text, preview_text
+
+PARAGRAPH = (
+    "In this chapter we evaluate the proposed method on three benchmark datasets and report "
+    "accuracy, precision and recall against the baselines described in Section 2. "
+)
+
+
+def make_thesis(path: str, page_count: int = 300):
+    import fitz
+
+    with fitz.open() as pdf:
+        for number in range(page_count):
+            page = pdf.new_page()
+            text = f"Chapter {number // 20 + 1}, page {number + 1}\n\n" + PARAGRAPH * 12
+            page.insert_textbox(fitz.Rect(50, 50, 550, 800), text, fontsize=10)
+        pdf.save(path)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def pypdf_three_passes(path: str):
+    from langchain_community.document_loaders import PyPDFLoader
+
+    # Upload preview, RAGChatBot.load_pdf and /paper-summary each parsed the file
+    for _ in range(3):
+        docs = PyPDFLoader(path).load()
+    return docs
+
+
+def pymupdf_single_pass(path: str):
+    pages = extract_pages(path)
+    preview_text(pages)
+    full_text(pages)
+    return pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdf", nargs="?", help="PDF to ingest (default: generated 300-page thesis)")
+    parser.add_argument("--pages", type=int, default=300, help="Pages in the generated thesis")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = args.pdf
+        if path is None:
+            path = os.path.join(temp_dir, "thesis.pdf")
+            make_thesis(path, args.pages)
+
+        docs, old = timed(pypdf_three_passes, path)
+        pages, new = timed(pymupdf_single_pass, path)
+        print(f"{len(pages)} pages")
+        print(f"PyPDF x3 (old)          {old:7.2f}s")
+        print(f"PyMuPDF single pass     {new:7.2f}s  speedup {old / new:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+# bench_pipeline.py
+"""Benchmark every pipeline stage end to end through the FastAPI app.
+
+Each stage sends requests with FastAPI's TestClient: captions and Whisper
+transcription, NLLB translation, Gemini summarization, the local extract_key_points
+fallback, paper upload, and paper Q&A with and without answer cache hits. Whisper,
+NLLB, llama.cpp, the embedding model, Gemini and YouTube are replaced with the
+deterministic fakes in benchmarks/fakes.py. Pass --real to use the production backends where they are
+installed. Caches start empty in a scratch directory, and every request carries
+fresh but deterministic input so caches do not hide the work.
+
+The report has latency percentiles and throughput for each stage. It is also
+written as JSON so runs from two commits can be diffed. Run from the backend
+directory:
+    python -m benchmarks.bench_pipeline [--iterations 20] [--real whisper nllb]
+    python -m benchmarks.bench_pipeline --compare benchmarks/results/pipeline-abc1234.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+from benchmarks import fakes
+from benchmarks.bench_extractive_summary import make_transcript
+from benchmarks.bench_pdf_ingestion import PARAGRAPH
+
+STAGES = (
+    "transcribe_captions",
+    "transcribe_whisper",
+    "translate_nllb",
+    "summarize",
+    "summarize_fallback",
+    "upload_paper",
+    "answer",
+    "answer_cached",
+)
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Linearly interpolated percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (position - low)
+
+
+def summarize_stage(latencies: List[float], errors: int, wall_seconds: float) -> Dict:
+    ordered = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "latency_ms": {
+            "p50": round(percentile(ordered, 50) * 1000, 3),
+            "p90": round(percentile(ordered, 90) * 1000, 3),
+            "p95": round(percentile(ordered, 95) * 1000, 3),
+            "p99": round(percentile(ordered, 99) * 1000, 3),
+            "mean": round(sum(ordered) / len(ordered) * 1000, 3) if ordered else 0.0,
+            "max": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+        },
+        "throughput_rps": round(len(latencies) / wall_seconds, 3) if wall_seconds else 0.0,
+    }
+
+
+def make_pdf(salt: str, pages: int) -> bytes:
+    import fitz
+
+    with fitz.open() as pdf:
+        for number in range(pages):
+            page = pdf.new_page()
+            text = f"Paper {salt}, page {number + 1}\n\n" + PARAGRAPH * 12
+            page.insert_textbox(fitz.Rect(50, 50, 550, 800), text, fontsize=10)
+        return pdf.tobytes()
+
+
+def video_url(prefix: str, i: int) -> str:
+    # YouTube ids are 11 characters; the fake only has captions for ids starting with "cap"
+    return f"https://www.youtube.com/watch?v={prefix}{i:08d}"
+
+
+def wait_for_transcript(client, response) -> bool:
+    if response.status_code != 202:
+        return False
+    job_id = response.json()["job_id"]
+    while True:
+        result = client.get(f"/transcribe/jobs/{job_id}/result")
+        if result.status_code != 202:
+            return result.status_code == 200
+        time.sleep(0.002)
+
+
+def build_stages(client, main, args) -> Dict[str, Callable[[int], bool]]:
+    """One callable per stage; each sends request number ``i`` and reports success."""
+    state: Dict[str, str] = {}
+
+    def transcribe(prefix: str):
+        def run(i: int) -> bool:
+            return wait_for_transcript(client, client.post("/transcribe", json={"url": video_url(prefix, i)}))
+        return run
+
+    def translate_nllb(i: int) -> bool:
+        text = make_transcript(args.translate_sentences, seed=i)
+        response = client.post("/translate", json={"text": text, "target_language": "hi", "method": "nllb"})
+        return response.status_code == 200 and "failed" not in response.json().get("translated_text", "")
+
+    def summarize(i: int) -> bool:
+        text = make_transcript(args.summary_sentences, seed=i)
+        return client.post("/summarize", json={"text": text}).status_code == 200
+
+    def summarize_fallback(i: int) -> bool:
+        client_before = main.transcript_summarizer.client
+        if isinstance(client_before, fakes.FakeGemini):
+            client_before.quota_exhausted = True
+        try:
+            text = make_transcript(args.summary_sentences, seed=100000 + i)
+            response = client.post("/summarize", json={"text": text})
+            return response.status_code == 200
+        finally:
+            if isinstance(client_before, fakes.FakeGemini):
+                client_before.quota_exhausted = False
+
+    def upload_paper(i: int) -> bool:
+        pdf = make_pdf(str(i), args.pdf_pages)
+        response = client.post("/upload_paper", files={"file": (f"paper-{i}.pdf", pdf, "application/pdf")})
+        if response.status_code == 200:
+            state.setdefault("pdf_id", response.json()["pdf_id"])
+        return response.status_code == 200
+
+    def ask(question: str) -> bool:
+        if "pdf_id" not in state and not upload_paper(-1):
+            return False
+        response = client.post("/answer", json={"pdf_id": state["pdf_id"], "question": question})
+        return response.status_code == 200
+
+    def answer(i: int) -> bool:
+        # Words unique to each question keep it below the answer cache's similarity threshold
+        return ask("What does the paper say about " + " ".join(f"topic{i}x{k}" for k in range(8)) + "?")
+
+    def answer_cached(i: int) -> bool:
+        return ask("What datasets were used to evaluate the method?")
+
+    return {
+        "transcribe_captions": transcribe("cap"),
+        "transcribe_whisper": transcribe("wsp"),
+        "translate_nllb": translate_nllb,
+        "summarize": summarize,
+        "summarize_fallback": summarize_fallback,
+        "upload_paper": upload_paper,
+        "answer": answer,
+        "answer_cached": answer_cached,
+    }
+
+
+def run_stage(run: Callable[[int], bool], iterations: int, warmup: int) -> Dict:
+    for i in range(warmup):
+        run(iterations + i)
+    latencies: List[float] = []
+    errors = 0
+    stage_start = time.perf_counter()
+    for i in range(iterations):
+        start = time.perf_counter()
+        try:
+            ok = run(i)
+        except Exception as e:
+            print(f"  request {i} raised {e!r}", file=sys.stderr)
+            ok = False
+        latencies.append(time.perf_counter() - start)
+        errors += not ok
+    return summarize_stage(latencies, errors, time.perf_counter() - stage_start)
+
+
+def git_revision() -> Dict[str, object]:
+    def git(*command) -> str:
+        return subprocess.run(["git", *command], capture_output=True, text=True, check=True).stdout.strip()
+
+    try:
+        return {"commit": git("rev-parse", "--short", "HEAD"), "dirty": bool(git("status", "--porcelain", "--", "."))}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": "unknown", "dirty": None}
+
+
+def print_report(results: Dict):
+    print(f"{'stage':<22} {'n':>4} {'err':>4} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'req/s':>9}")
+    for name, stage in results["stages"].items():
+        latency = stage["latency_ms"]
+        print(f"{name:<22} {stage['requests']:>4} {stage['errors']:>4} {latency['p50']:>10.2f} "
+              f"{latency['p95']:>10.2f} {latency['p99']:>10.2f} {stage['throughput_rps']:>9.2f}")
+
+
+def print_comparison(base: Dict, head: Dict):
+    print(f"\nvs {base['git']['commit']} (positive = slower)")
+    print(f"{'stage':<22} {'p50':>9} {'p95':>9} {'req/s':>9}")
+    for name, stage in head["stages"].items():
+        old = base["stages"].get(name)
+        if old is None:
+            continue
+
+        def change(new_value: float, old_value: float) -> str:
+            return f"{(new_value - old_value) / old_value * 100:+8.1f}%" if old_value else f"{'n/a':>9}"
+
+        print(f"{name:<22} {change(stage['latency_ms']['p50'], old['latency_ms']['p50'])} "
+              f"{change(stage['latency_ms']['p95'], old['latency_ms']['p95'])} "
+              f"{change(old['throughput_rps'], stage['throughput_rps'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    parser.add_argument("--iterations", type=int, default=20, help="Timed requests per stage")
+    parser.add_argument("--warmup", type=int, default=2, help="Untimed requests per stage")
+    parser.add_argument("--real", nargs="*", choices=fakes.BACKENDS, default=[],
+                        help="Backends to run for real when installed (default: all fakes)")
+    parser.add_argument("--audio-seconds", type=float, default=600.0, help="Length of the fake lecture audio")
+    parser.add_argument("--translate-sentences", type=int, default=40)
+    parser.add_argument("--summary-sentences", type=int, default=3000, help="About a 3-hour lecture")
+    parser.add_argument("--pdf-pages", type=int, default=20)
+    parser.add_argument("--output", help="Results JSON (default: benchmarks/results/pipeline-<commit>.json)")
+    parser.add_argument("--compare", help="Earlier results JSON to compare against")
+    args = parser.parse_args()
+
+    # Caches, indexes and the paper registry live in a scratch directory for the run
+    scratch = tempfile.mkdtemp(prefix="bench-pipeline-")
+    for variable, name in (
+        ("TRANSCRIPT_CACHE_PATH", "transcripts.sqlite3"),
+        ("TRANSLATION_MEMORY_PATH", "translation_memory.sqlite3"),
+        ("SUMMARY_CACHE_PATH", "summaries.sqlite3"),
+        ("PAPER_REGISTRY_PATH", "papers.sqlite3"),
+        ("VECTOR_INDEX_DIR", "vectorstore"),
+        ("CORPUS_INDEX_DIR", "corpus_index"),
+    ):
+        os.environ[variable] = os.path.join(scratch, name)
+    os.environ.setdefault("WHISPER_PARALLEL_WORKERS", "0")
+
+    from fastapi.testclient import TestClient
+    import main as app_module
+
+    fake_model_path = os.path.join(scratch, "fake-model.gguf")
+    open(fake_model_path, "wb").close()
+    backends = fakes.install(app_module, real=args.real, model_path=fake_model_path,
+                             audio_seconds=args.audio_seconds)
+
+    results = {
+        "schema": 1,
+        "git": git_revision(),
+        "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "backends": backends,
+        "config": {
+            "iterations": args.iterations,
+            "warmup": args.warmup,
+            "audio_seconds": args.audio_seconds,
+            "translate_sentences": args.translate_sentences,
+            "summary_sentences": args.summary_sentences,
+            "pdf_pages": args.pdf_pages,
+        },
+        "stages": {},
+    }
+
+    with TestClient(app_module.app) as client:
+        stages = build_stages(client, app_module, args)
+        for name in args.stages:
+            print(f"Running {name}...", file=sys.stderr)
+            results["stages"][name] = run_stage(stages[name], args.iterations, args.warmup)
+
+    print_report(results)
+    output = args.output or os.path.join(RESULTS_DIR, f"pipeline-{results['git']['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as out:
+        json.dump(results, out, indent=2, sort_keys=True)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as base:
+            print_comparison(json.load(base), results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# bench_section_detection.py
+"""Compare extract_key_points' old per-pattern regex scans with the single-pass segmenter.
+
+Large synthetic transcripts are generated with no markers, with bracketed timestamps,
+with dash timestamps (the last pattern the old code tried), and with long digit runs
+such as number tables, where the old scans restart at every digit. For each, both
+implementations must pick the same sections. Run from the backend directory:
+    python -m benchmarks.bench_section_detection [--sizes-mb 1 4 16]
+"""
+import argparse
+import random
+import re
+import time
+
+from sections import SECTION_MARKERS, find_sections, sample_sections
+
+LEGACY_PATTERNS = [
+    r'(?:Section|Chapter|Part|Topic|Module)\s*\d+:.*?(?=(?:Section|Chapter|Part|Topic|Module)\s*\d+:|$)',
+    r'\[\d+:\d+\].*?(?=\[\d+:\d+\]|$)',
+    r'\(\d+:\d+\).*?(?=\(\d+:\d+\)|$)',
+    r'\d+:\d+\s*-.*?(?=\d+:\d+\s*-|$)'
+]
+
+WORDS = "so today we are going to talk about gradient descent and how the learning rate works".split()
+
+
+def make_transcript(size_bytes: int, marker: str, number_digits: int = 400, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    parts = []
+    total = 0
+    minute = 0
+    while total < size_bytes:
+        if marker == "bracket":
+            parts.append(f"[{minute // 60}:{minute % 60:02d}]")
+        elif marker == "dash":
+            parts.append(f"{minute // 60}:{minute % 60:02d} -")
+        elif marker == "numbers":
+            parts.append("".join(rng.choices("0123456789", k=number_digits)))
+        parts.append(" ".join(rng.choices(WORDS, k=40)))
+        total = sum(len(part) + 1 for part in parts[-2:]) + total
+        minute += 1
+    return " ".join(parts)
+
+
+def legacy_sample(text: str):
+    for pattern in LEGACY_PATTERNS:
+        sections = re.findall(pattern, text, re.DOTALL)
+        if len(sections) > 3:
+            return "\n\n".join([sections[0], sections[len(sections)//2], sections[-1]])
+    return None
+
+
+def single_pass_sample(text: str):
+    sections = find_sections(text)
+    for kind in SECTION_MARKERS:
+        if len(sections[kind]) > 3:
+            return sample_sections(text, sections[kind])
+    return None
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes-mb", type=float, nargs="+", default=[1, 4, 16], help="Transcript sizes in MB")
+    args = parser.parse_args()
+
+    print(f"{'size':>8} {'markers':>8} {'sections':>9} {'legacy':>9} {'single':>9} {'speedup':>8}")
+    for size_mb in args.sizes_mb:
+        for marker in ("none", "bracket", "dash", "numbers"):
+            text = make_transcript(int(size_mb * 1024 * 1024), marker)
+            old, old_seconds = timed(legacy_sample, text)
+            new, new_seconds = timed(single_pass_sample, text)
+            if old != new:
+                raise SystemExit(f"Section samples differ for {size_mb} MB transcript with {marker} markers")
+            count = max(len(offsets) for offsets in find_sections(text).values())
+            print(f"{size_mb:>6.1f}MB {marker:>8} {count:>9} {old_seconds:>8.3f}s {new_seconds:>8.3f}s "
+                  f"{old_seconds / new_seconds:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
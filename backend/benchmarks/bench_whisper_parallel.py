@@ -0,0 +1,46 @@
+# bench_whisper_parallel.py
+"""Compare single-pass Whisper against chunk-parallel transcription on one audio file.
+
+Run from the backend directory:
+    python -m benchmarks.bench_whisper_parallel lecture.mp3 --model base --workers 4
+"""
+import argparse
+import time
+
+import whisper
+
+from audio import decode_to_pcm
+from transcription import ParallelTranscriber
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("audio", help="Path to an audio file (any format ffmpeg can read)")
+    parser.add_argument("--model", default="base", help="Whisper model name")
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4], help="Process pool sizes to try")
+    parser.add_argument("--chunk-seconds", type=float, default=120.0, help="Target chunk length")
+    args = parser.parse_args()
+
+    audio = decode_to_pcm(args.audio)
+    model = whisper.load_model(args.model)
+    start = time.perf_counter()
+    result = model.transcribe(audio)
+    baseline = time.perf_counter() - start
+    print(f"single-pass           {baseline:8.1f}s  {len(result['segments'])} segments")
+
+    for workers in args.workers:
+        transcriber = ParallelTranscriber(args.model, workers, args.chunk_seconds)
+        # Warm the pool first so model loading in the workers is not counted
+        pool = transcriber._pool()
+        for future in [pool.submit(time.sleep, 1) for _ in range(workers)]:
+            future.result()
+        start = time.perf_counter()
+        result = transcriber.transcribe(audio)
+        elapsed = time.perf_counter() - start
+        transcriber.shutdown()
+        print(f"parallel x{workers:<2} ({result['chunks']:>3} chunks) {elapsed:8.1f}s  "
+              f"{len(result['segments'])} segments  speedup {baseline / elapsed:4.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# compare_nllb_backends.py
+"""Compare NLLB CPU backends on a fixed sentence set: speed, resident memory and quality vs fp32.
+
+Quality is chrF against the fp32 output, so 100 means identical translations.
+Each backend runs in a fresh subprocess, so its memory figures do not include
+what an earlier backend allocated and the allocator kept.
+The ct2 backend needs an exported model, e.g.:
+    ct2-transformers-converter --model facebook/nllb-200-distilled-600M \\
+        --quantization int8 --output_dir models/nllb-200-distilled-600M-ct2
+
+Run from the backend directory:
+    python -m benchmarks.compare_nllb_backends --backends fp32 int8 ct2
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+from collections import Counter
+
+from benchmarks.bench_nllb_batching import SAMPLE_SENTENCES
+from translation import load_nllb, translate_batched
+
+
+def chrf(hypothesis: str, reference: str, max_order: int = 6, beta: float = 2.0) -> float:
+    """Character n-gram F-score (chrF) of one hypothesis against one reference, 0-100."""
+    hypothesis, reference = hypothesis.replace(" ", ""), reference.replace(" ", "")
+    precisions, recalls = [], []
+    for n in range(1, max_order + 1):
+        hyp = Counter(hypothesis[i:i + n] for i in range(len(hypothesis) - n + 1))
+        ref = Counter(reference[i:i + n] for i in range(len(reference) - n + 1))
+        if not hyp or not ref:
+            continue
+        overlap = sum((hyp & ref).values())
+        precisions.append(overlap / sum(hyp.values()))
+        recalls.append(overlap / sum(ref.values()))
+    if not precisions:
+        return 100.0 if hypothesis == reference else 0.0
+    precision, recall = sum(precisions) / len(precisions), sum(recalls) / len(recalls)
+    if precision + recall == 0:
+        return 0.0
+    return 100 * (1 + beta ** 2) * precision * recall / (beta ** 2 * precision + recall)
+
+
+def memory_mb(field: str = "VmRSS") -> float:
+    """Resident (VmRSS) or peak resident (VmHWM) set size of this process (Linux)."""
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith(field + ":"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def run_backend(args) -> dict:
+    """Load one backend and translate the sample set; runs inside the worker process."""
+    sentences = list(SAMPLE_SENTENCES)
+    start = time.perf_counter()
+    tokenizer, model = load_nllb(args.model, backend=args.worker, ct2_dir=args.ct2_dir)
+    load_seconds = time.perf_counter() - start
+
+    translate_batched(tokenizer, model, sentences[:2], args.target, batch_size=2)
+    start = time.perf_counter()
+    outputs = translate_batched(tokenizer, model, sentences, args.target, batch_size=args.batch_size)
+    elapsed = time.perf_counter() - start
+    return {
+        "load_seconds": load_seconds,
+        "seconds": elapsed,
+        "rss_mb": memory_mb("VmRSS"),
+        "peak_mb": memory_mb("VmHWM"),
+        "outputs": outputs,
+    }
+
+
+def spawn_backend(args, backend: str) -> dict:
+    command = [
+        sys.executable, "-m", "benchmarks.compare_nllb_backends", "--worker", backend,
+        "--model", args.model, "--ct2-dir", args.ct2_dir, "--target", args.target,
+        "--batch-size", str(args.batch_size),
+    ]
+    completed = subprocess.run(command, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise SystemExit(f"{backend} backend failed:\n{completed.stderr}")
+    # The result is the last stdout line; model loading may log above it
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="facebook/nllb-200-distilled-600M")
+    parser.add_argument("--ct2-dir", default="models/nllb-200-distilled-600M-ct2")
+    parser.add_argument("--backends", nargs="+", default=["fp32", "int8"])
+    parser.add_argument("--target", default="hin_Deva", help="NLLB target language code")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_backend(args)))
+        return
+
+    reference = None
+    backends = ["fp32"] + [backend for backend in args.backends if backend != "fp32"]
+
+    print(f"{'backend':<8} {'load':>7} {'time':>8} {'sent/s':>8} {'RSS':>10} {'peak':>10} {'chrF':>6}")
+    for backend in backends:
+        result = spawn_backend(args, backend)
+        outputs = result["outputs"]
+        if reference is None:
+            reference = outputs
+        quality = sum(chrf(h, r) for h, r in zip(outputs, reference)) / len(outputs)
+        print(f"{backend:<8} {result['load_seconds']:6.1f}s {result['seconds']:7.2f}s "
+              f"{len(outputs) / result['seconds']:8.2f} {result['rss_mb']:8.0f}MB {result['peak_mb']:8.0f}MB "
+              f"{quality:6.1f}")
+
+
+if __name__ == "__main__":
+    main()
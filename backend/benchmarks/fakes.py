@@ -0,0 +1,219 @@
+# fakes.py
+"""Deterministic local stand-ins for the model and network backends used by main.py.
+
+``install(main, real=...)`` swaps them into an imported ``main`` module. Backends named
+in ``real`` keep their production loaders when their dependencies are present, so the
+same benchmark can run against small real models.
+"""
+import hashlib
+import importlib.util
+import logging
+import math
+import os
+import re
+from concurrent.futures import Future
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from audio import SAMPLE_RATE
+from translation import CTranslate2NLLB
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("whisper", "nllb", "llm", "embeddings", "gemini", "youtube")
+
+FILLER = (
+    "today we look at how gradient descent finds the minimum of a loss function and why "
+    "the learning rate matters for convergence on real data"
+).split()
+
+
+def _words(seed: str, count: int) -> List[str]:
+    # Same seed, same words: fakes must give identical output on every run
+    digest = hashlib.sha256(seed.encode("utf-8")).digest()
+    return [FILLER[(digest[i % len(digest)] + i) % len(FILLER)] for i in range(count)]
+
+
+class FakeWhisper:
+    """Emits one ten-second segment of filler text per ten seconds of audio."""
+
+    def transcribe(self, audio, **kwargs) -> Dict:
+        duration = len(audio) / SAMPLE_RATE
+        segments = []
+        for i in range(max(1, math.ceil(duration / 10))):
+            text = " ".join(_words(f"segment-{i}", 20)) + "."
+            segments.append({"start": i * 10.0, "end": min(duration, (i + 1) * 10.0), "text": " " + text})
+        return {"text": "".join(segment["text"] for segment in segments).strip(), "segments": segments}
+
+
+def fake_acquire_audio(url: str, seconds: float = 600.0) -> Dict:
+    """Silent PCM of the requested length instead of a yt-dlp download."""
+    audio = np.zeros(int(seconds * SAMPLE_RATE), dtype=np.float32)
+    return {
+        "audio": audio,
+        "stats": {"bytes_downloaded": 0, "download_seconds": 0.0, "decode_seconds": 0.0, "duration_seconds": seconds}
+    }
+
+
+class FakeYouTubeTranscriptApi:
+    """Captions exist only for video ids starting with ``cap``; others fall back to Whisper."""
+
+    @staticmethod
+    def get_transcript(video_id: str) -> List[Dict]:
+        if not video_id.startswith("cap"):
+            raise RuntimeError(f"No captions for {video_id}")
+        return [
+            {"text": " ".join(_words(f"{video_id}-{i}", 12)), "start": i * 4.0, "duration": 4.0}
+            for i in range(150)
+        ]
+
+
+class FakeNLLBTokenizer:
+    src_lang = "eng_Latn"
+
+    def __call__(self, sentences: List[str], truncation: bool = True, **kwargs) -> Dict:
+        return {"input_ids": [[0] * (len(sentence.split()) + 2) for sentence in sentences]}
+
+
+class FakeNLLBModel(CTranslate2NLLB):
+    """Takes the CTranslate2 branch of ``translate_batched`` without loading anything."""
+
+    def __init__(self):
+        pass
+
+    def translate_batch(self, tokenizer, sentences: List[str], target_lang: str,
+                        max_length: int = 512) -> List[str]:
+        return [f"[{target_lang}] {sentence[::-1]}" for sentence in sentences]
+
+
+class FakeLLMEngine:
+    """Implements the ``LLMEngine`` interface with canned, prompt-seeded answers."""
+
+    def __init__(self, answer_words: int = 60):
+        self.answer_words = answer_words
+
+    def _answer(self, prompt: str) -> List[str]:
+        return _words(prompt, self.answer_words)
+
+    def submit(self, prompt: str, stop: Optional[List[str]] = None) -> Future:
+        future: Future = Future()
+        future.set_result(" ".join(self._answer(prompt)))
+        return future
+
+    def generate(self, prompt: str, stop: Optional[List[str]] = None) -> str:
+        return self.submit(prompt, stop).result()
+
+    def stream(self, prompt: str, stop: Optional[List[str]] = None) -> Iterable[str]:
+        for word in self._answer(prompt):
+            yield word + " "
+
+    def pending(self) -> int:
+        return 0
+
+    def shutdown(self):
+        pass
+
+
+class FakeEmbeddings(Embeddings):
+    """Feature-hashed bag of words, so similar texts still get similar vectors."""
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+        self.model_name = f"fake-hashing-{dim}"
+        self.chunks_embedded = 0
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in re.findall(r"\w+", text.lower()):
+                vectors[row, int(hashlib.md5(word.encode("utf-8")).hexdigest()[:8], 16) % self.dim] += 1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors /= np.where(norms > 0, norms, 1.0)
+        self.chunks_embedded += len(texts)
+        return vectors.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed([text])[0]
+
+    def stats(self) -> Dict:
+        return {"model": self.model_name, "chunks_embedded": self.chunks_embedded}
+
+
+class _Response:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeGemini:
+    """``generate_content`` returns the last words of the prompt as a bullet list.
+
+    With ``quota_exhausted`` every call fails the way Gemini does when the quota is used
+    up, which drives /summarize into its local ``extract_key_points`` fallback.
+    """
+
+    def __init__(self, quota_exhausted: bool = False, summary_words: int = 80):
+        self.quota_exhausted = quota_exhausted
+        self.summary_words = summary_words
+
+    def generate_content(self, prompt: str) -> _Response:
+        if self.quota_exhausted:
+            raise RuntimeError("429 Resource has been exhausted (e.g. check quota).")
+        words = prompt.split()[-self.summary_words:]
+        return _Response("\n".join(f"• {' '.join(words[i:i + 10])}" for i in range(0, len(words), 10)))
+
+
+def real_backend_available(main, backend: str) -> bool:
+    """Whether the production backend can run here: its packages, weights or keys exist."""
+    if backend == "whisper":
+        return importlib.util.find_spec("whisper") is not None
+    if backend == "nllb":
+        return importlib.util.find_spec("transformers") is not None and importlib.util.find_spec("torch") is not None
+    if backend == "llm":
+        return importlib.util.find_spec("llama_cpp") is not None and os.path.exists(main.MODEL_PATH)
+    if backend == "embeddings":
+        return importlib.util.find_spec("sentence_transformers") is not None
+    if backend == "gemini":
+        return bool(os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY"))
+    if backend == "youtube":
+        return importlib.util.find_spec("yt_dlp") is not None
+    raise ValueError(f"Unknown backend {backend!r}")
+
+
+def install(main, real: Iterable[str] = (), model_path: Optional[str] = None,
+            audio_seconds: float = 600.0) -> Dict[str, str]:
+    """Replace every backend not in ``real`` (or not available) with its fake.
+
+    ``model_path`` must name an existing file; it stands in for the GGUF weights that
+    the upload endpoint checks for. Returns which implementation each backend uses.
+    """
+    chosen = {}
+    for backend in BACKENDS:
+        if backend in real and real_backend_available(main, backend):
+            chosen[backend] = "real"
+            continue
+        if backend in real:
+            logger.warning(f"Real {backend} backend is not available here; using the fake")
+        chosen[backend] = "fake"
+
+        if backend == "whisper":
+            main.model_registry.register("whisper", FakeWhisper)
+        elif backend == "nllb":
+            main.model_registry.register("nllb", lambda: (FakeNLLBTokenizer(), FakeNLLBModel()))
+        elif backend == "llm":
+            main.model_registry.register("llm", FakeLLMEngine, idle_ttl=0)
+            main.MODEL_PATH = model_path
+        elif backend == "embeddings":
+            main.model_registry.register("embeddings", FakeEmbeddings, idle_ttl=0)
+        elif backend == "gemini":
+            client = FakeGemini()
+            main.transcript_summarizer.client = client
+            main.paper_summarizer.client = client
+        elif backend == "youtube":
+            main.YouTubeTranscriptApi = FakeYouTubeTranscriptApi
+            main.acquire_audio = lambda url: fake_acquire_audio(url, audio_seconds)
+    return chosen
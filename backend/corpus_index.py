@@ -0,0 +1,281 @@
+# corpus_index.py
+import json
+import logging
+import math
+import os
+import threading
+from typing import Dict, Iterable, List, Optional
+
+import faiss
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "corpus.faiss"
+METADATA_FILE = "chunks.jsonl"
+# Vectors added since the last index checkpoint: an int64 start id, then float32 rows
+PENDING_FILE = "pending.f32"
+
+
+class CorpusIndex:
+    """One vector index over the chunks of every uploaded paper.
+
+    Starts as an exact flat index and is rebuilt as an IVF index once it holds
+    ``ann_threshold`` vectors (and retrained whenever it doubles), so query latency stays
+    flat as the library grows. Vector ids are positions, and each position has a metadata
+    record with the paper key and page, which restricts searches to one or more papers.
+
+    Uploads only append: vectors go to a pending log and then chunk metadata to a JSONL
+    file, so a crash can leave vectors without metadata but never the reverse. The full
+    index is rewritten (atomically) only when it is created or rebuilt, and on
+    ``checkpoint()``; loading replays the pending log on top of it and trims both files
+    back to the records they have in common.
+    """
+
+    def __init__(self, root_dir: str, ann_threshold: int = 50000, nprobe: int = 16,
+                 exact_limit: int = 20000):
+        self.root_dir = root_dir
+        self.ann_threshold = ann_threshold
+        self.nprobe = nprobe
+        # Paper-restricted searches over an IVF index at most this many vectors are exact
+        self.exact_limit = exact_limit
+        self._lock = threading.RLock()
+        self._checkpoint_lock = threading.Lock()
+        self._index: Optional[faiss.Index] = None
+        self._chunks: List[Dict] = []
+        self._paper_ids: Dict[str, List[int]] = {}
+        self._trained_size = 0
+        os.makedirs(root_dir, exist_ok=True)
+        self._load()
+
+    @property
+    def size(self) -> int:
+        return len(self._chunks)
+
+    def has_paper(self, paper_key: str) -> bool:
+        with self._lock:
+            return paper_key in self._paper_ids
+
+    def add_paper(self, paper_key: str, vectors: np.ndarray, chunks: List[Dict]):
+        """Add a paper's chunk vectors; ``chunks`` holds ``{"page", "text"}`` for each row."""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        # Lock order is checkpoint then index, as in checkpoint(); taking both keeps the
+        # log, the metadata and any checkpoint written here in id order
+        with self._checkpoint_lock, self._lock:
+            if paper_key in self._paper_ids or len(vectors) == 0:
+                return
+            created = self._index is None
+            if created:
+                self._index = faiss.IndexFlatL2(vectors.shape[1])
+
+            start = len(self._chunks)
+            self._index.add(vectors)
+            self._paper_ids[paper_key] = list(range(start, start + len(vectors)))
+            new_chunks = [
+                {"paper": paper_key, "page": chunk.get("page"), "text": chunk["text"]}
+                for chunk in chunks
+            ]
+            self._chunks.extend(new_chunks)
+
+            rebuild = self.size >= self.ann_threshold and self.size >= 2 * self._trained_size
+            if rebuild:
+                self._rebuild_ivf()
+            # Vectors are on disk before their metadata
+            if rebuild or created:
+                self._write_checkpoint(faiss.serialize_index(self._index), self._index.ntotal)
+            else:
+                self._append_pending(vectors)
+            self._append_metadata(new_chunks)
+            logger.info(f"Corpus index now holds {self.size} chunks from {len(self._paper_ids)} papers")
+
+    def search(self, query_vector: Iterable[float], k: int = 5,
+               paper_keys: Optional[List[str]] = None) -> List[Dict]:
+        """Nearest chunks to ``query_vector``, optionally restricted to ``paper_keys``."""
+        query = np.asarray([query_vector], dtype=np.float32)
+        with self._lock:
+            if self._index is None or self.size == 0:
+                return []
+
+            params = None
+            if paper_keys is not None:
+                ids = np.asarray([i for key in paper_keys for i in self._paper_ids.get(key, [])], dtype=np.int64)
+                if not len(ids):
+                    return []
+                selector = faiss.IDSelectorBatch(ids)
+                if isinstance(self._index, faiss.IndexIVF):
+                    if len(ids) <= self.exact_limit:
+                        # Probing the lists nearest the query would miss most of a few
+                        # papers' chunks, which sit in other lists; search those exactly
+                        distances, ids = self._exact_search(query, k, ids)
+                        return self._hits(distances, ids)
+                    # Probe enough lists to see about as many selected vectors as an
+                    # unrestricted search sees vectors
+                    nprobe = min(self._index.nlist, math.ceil(self.nprobe * self._index.ntotal / len(ids)))
+                    params = faiss.SearchParametersIVF(sel=selector, nprobe=nprobe)
+                else:
+                    params = faiss.SearchParameters(sel=selector)
+            elif isinstance(self._index, faiss.IndexIVF):
+                params = faiss.SearchParametersIVF(nprobe=self.nprobe)
+
+            distances, ids = self._index.search(query, k, params=params)
+            return self._hits(distances[0], ids[0])
+
+    def _exact_search(self, query: np.ndarray, k: int, ids: np.ndarray):
+        vectors = self._index.reconstruct_batch(ids)
+        distances = ((vectors - query) ** 2).sum(axis=1)
+        top = np.argsort(distances)[:k]
+        return distances[top], ids[top]
+
+    def _hits(self, distances, ids) -> List[Dict]:
+        return [
+            {**self._chunks[i], "score": float(distance)}
+            for distance, i in zip(distances, ids)
+            if 0 <= i < len(self._chunks)
+        ]
+
+    def _rebuild_ivf(self):
+        # Train IVF centroids on the current vectors and re-add them in position order
+        vectors = self._index.reconstruct_n(0, self._index.ntotal)
+        dim = vectors.shape[1]
+        nlist = max(1, int(4 * math.sqrt(len(vectors))))
+        quantizer = faiss.IndexFlatL2(dim)
+        index = faiss.IndexIVFFlat(quantizer, dim, nlist)
+        sample = vectors[np.random.default_rng(0).permutation(len(vectors))[:nlist * 64]]
+        index.train(sample)
+        index.add(vectors)
+        # IVF lists need a direct map so vectors can be reconstructed at the next retrain
+        index.make_direct_map()
+        self._index = index
+        self._trained_size = len(vectors)
+        logger.info(f"Rebuilt corpus index as IVF with {nlist} lists over {len(vectors)} vectors")
+
+    def checkpoint(self):
+        """Write the full index atomically and start a new, empty pending log.
+
+        The index is serialized to memory under the lock but written to disk outside
+        it, so searches are not held up by the disk write (uploads are).
+        """
+        with self._checkpoint_lock:
+            with self._lock:
+                if self._index is None:
+                    return
+                data = faiss.serialize_index(self._index)
+                ntotal = self._index.ntotal
+            self._write_checkpoint(data, ntotal)
+        logger.info(f"Checkpointed corpus index with {ntotal} vectors")
+
+    def _write_checkpoint(self, data: np.ndarray, ntotal: int):
+        index_path = os.path.join(self.root_dir, INDEX_FILE)
+        with open(index_path + ".tmp", "wb") as out:
+            out.write(data.tobytes())
+        os.replace(index_path + ".tmp", index_path)
+        with self._lock:
+            # Vectors added during the write stay in the log; loading skips the rest
+            self._write_pending_header(ntotal)
+
+    def _write_pending_header(self, start: int):
+        pending_path = os.path.join(self.root_dir, PENDING_FILE)
+        rows = self._index.ntotal - start
+        with open(pending_path + ".tmp", "wb") as out:
+            out.write(np.int64(start).tobytes())
+            if rows > 0:
+                out.write(self._index.reconstruct_n(start, rows).tobytes())
+        os.replace(pending_path + ".tmp", pending_path)
+
+    def _append_pending(self, vectors: np.ndarray):
+        with open(os.path.join(self.root_dir, PENDING_FILE), "ab") as out:
+            out.write(vectors.tobytes())
+
+    def _append_metadata(self, chunks: List[Dict]):
+        with open(os.path.join(self.root_dir, METADATA_FILE), "a", encoding="utf-8") as out:
+            for chunk in chunks:
+                out.write(json.dumps(chunk) + "\n")
+
+    def _load(self):
+        index_path = os.path.join(self.root_dir, INDEX_FILE)
+        metadata_path = os.path.join(self.root_dir, METADATA_FILE)
+        if not os.path.exists(index_path):
+            # Metadata written ahead of a first checkpoint that never happened
+            if os.path.exists(metadata_path):
+                os.remove(metadata_path)
+            return
+        self._chunks = []
+        metadata_ok = True
+        if os.path.exists(metadata_path):
+            with open(metadata_path, encoding="utf-8") as metadata:
+                for line in metadata:
+                    try:
+                        self._chunks.append(json.loads(line))
+                    except ValueError:
+                        # A torn final line
+                        metadata_ok = False
+                        break
+        self._index = faiss.read_index(index_path)
+        # A checkpoint written just before a crash can be ahead of its metadata
+        trimmed = self._index.ntotal > len(self._chunks)
+        if trimmed:
+            logger.warning(f"Dropping {self._index.ntotal - len(self._chunks)} corpus vectors without chunk records")
+            self._index.remove_ids(faiss.IDSelectorRange(len(self._chunks), self._index.ntotal))
+        if isinstance(self._index, faiss.IndexIVF):
+            self._index.make_direct_map()
+            self._trained_size = self._index.ntotal
+        base = self._index.ntotal
+        log_ok = self._replay_pending(len(self._chunks))
+        if len(self._chunks) > self._index.ntotal:
+            # Older trees wrote metadata first, so a crash could leave extra records
+            logger.warning(f"Dropping {len(self._chunks) - self._index.ntotal} corpus chunk records without vectors")
+            del self._chunks[self._index.ntotal:]
+            metadata_ok = False
+        if not metadata_ok:
+            self._rewrite_metadata()
+        if trimmed:
+            self._write_checkpoint(faiss.serialize_index(self._index), self._index.ntotal)
+        elif not log_ok:
+            self._write_pending_header(base)
+        for i, chunk in enumerate(self._chunks):
+            self._paper_ids.setdefault(chunk["paper"], []).append(i)
+        logger.info(f"Loaded corpus index with {self.size} chunks from {len(self._paper_ids)} papers")
+
+    def _rewrite_metadata(self):
+        metadata_path = os.path.join(self.root_dir, METADATA_FILE)
+        with open(metadata_path + ".tmp", "w", encoding="utf-8") as out:
+            for chunk in self._chunks:
+                out.write(json.dumps(chunk) + "\n")
+        os.replace(metadata_path + ".tmp", metadata_path)
+
+    def _replay_pending(self, limit: int) -> bool:
+        """Add logged vectors, up to ``limit`` in all; False when the log needs rewriting."""
+        pending_path = os.path.join(self.root_dir, PENDING_FILE)
+        if not os.path.exists(pending_path):
+            # Written before the log existed
+            return False
+        with open(pending_path, "rb") as pending:
+            header = pending.read(8)
+            data = pending.read()
+        if len(header) < 8:
+            return False
+        start = int(np.frombuffer(header, dtype=np.int64)[0])
+        if start > self._index.ntotal:
+            # Logged on top of checkpointed vectors that were just dropped
+            return False
+        row_bytes = self._index.d * 4
+        # A torn final append leaves a partial row; drop it
+        rows = np.frombuffer(data[:len(data) // row_bytes * row_bytes], dtype=np.float32).reshape(-1, self._index.d)
+        complete = len(data) % row_bytes == 0 and start + len(rows) <= limit
+        # Rows before ntotal were already in the index when it was checkpointed, and
+        # rows past ``limit`` never got their metadata
+        rows = rows[self._index.ntotal - start:limit - start]
+        if len(rows):
+            self._index.add(np.ascontiguousarray(rows))
+            logger.info(f"Replayed {len(rows)} pending corpus vectors")
+        return complete
+
+def vectors_from_faiss_store(vectorstore):
+    """Pull vectors and chunk metadata out of a LangChain FAISS store without re-embedding."""
+    index = vectorstore.index
+    vectors = index.reconstruct_n(0, index.ntotal)
+    chunks = []
+    for position in range(index.ntotal):
+        doc = vectorstore.docstore.search(vectorstore.index_to_docstore_id[position])
+        chunks.append({"page": doc.metadata.get("page"), "text": doc.page_content})
+    return vectors, chunks
@@ -0,0 +1,99 @@
+# embeddings.py
+import logging
+import threading
+import time
+from typing import Dict, List
+
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EMBEDDING_MODEL = "sentence-transformers/all-mpnet-base-v2"
+
+
+class EmbeddingService(Embeddings):
+    """One resident sentence-transformers model that embeds text in fixed-size batches.
+
+    Implements the LangChain ``Embeddings`` interface so vector stores, query embedding
+    and caches can all share it.
+    """
+
+    def __init__(self, model_name: str = DEFAULT_EMBEDDING_MODEL, batch_size: int = 64, device: str = "cpu"):
+        from sentence_transformers import SentenceTransformer
+
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.model = SentenceTransformer(model_name, device=device)
+        self.chunks_embedded = 0
+        self.seconds_embedding = 0.0
+        # Concurrent encode calls only fight over the same CPU cores, so one batch runs at a
+        # time. Large jobs take turns batch by batch and step aside for waiting small ones,
+        # so a query embedding never waits behind a whole upload.
+        self._turn = threading.Condition()
+        self._encoding = False
+        self._small_waiting = 0
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        small = len(texts) <= self.batch_size
+        start = time.perf_counter()
+        vectors = []
+        for i in range(0, len(texts), self.batch_size):
+            vectors.extend(self._encode_batch(texts[i:i + self.batch_size], small).tolist())
+        elapsed = time.perf_counter() - start
+        if not small:
+            logger.info(f"Embedded {len(texts)} chunks in {elapsed:.2f}s ({len(texts) / max(elapsed, 1e-9):.1f} chunks/sec)")
+        return vectors
+
+    def _encode_batch(self, batch: List[str], small: bool):
+        with self._turn:
+            if small:
+                self._small_waiting += 1
+            while self._encoding or (not small and self._small_waiting):
+                self._turn.wait()
+            if small:
+                self._small_waiting -= 1
+            self._encoding = True
+        start = time.perf_counter()
+        try:
+            return self.model.encode(
+                batch,
+                batch_size=self.batch_size,
+                convert_to_numpy=True,
+                show_progress_bar=False
+            )
+        finally:
+            with self._turn:
+                self.chunks_embedded += len(batch)
+                self.seconds_embedding += time.perf_counter() - start
+                self._encoding = False
+                self._turn.notify_all()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed([text.replace("\n", " ") for text in texts])
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed([text.replace("\n", " ")])[0]
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "model": self.model_name,
+            "batch_size": self.batch_size,
+            "chunks_embedded": self.chunks_embedded,
+            "seconds_embedding": round(self.seconds_embedding, 3),
+            "chunks_per_second": round(self.chunks_embedded / self.seconds_embedding, 2)
+            if self.seconds_embedding else 0.0
+        }
+
+
+_services: Dict[str, EmbeddingService] = {}
+_services_lock = threading.Lock()
+
+
+def shared_embedding_service(model_name: str = DEFAULT_EMBEDDING_MODEL, **kwargs) -> EmbeddingService:
+    """Return the process-wide embedding service for ``model_name``, loading it on first use."""
+    with _services_lock:
+        if model_name not in _services:
+            _services[model_name] = EmbeddingService(model_name, **kwargs)
+        return _services[model_name]
@@ -0,0 +1,118 @@
+# extractive.py
+import logging
+import re
+from functools import lru_cache
+from typing import List, Tuple
+
+import numpy as np
+from scipy import sparse
+
+logger = logging.getLogger(__name__)
+
+METHODS = ("frequency", "textrank")
+
+_WORD_RE = re.compile(r"\w+")
+
+
+@lru_cache(maxsize=1)
+def _stop_words() -> frozenset:
+    from nltk.corpus import stopwords
+    return frozenset(stopwords.words("english"))
+
+
+def term_matrix(sentences: List[str]) -> Tuple[sparse.csr_matrix, np.ndarray]:
+    """Tokenize every sentence once into a sentence x term count matrix.
+
+    Stop words are left out of the matrix but still count toward each sentence's length,
+    which is returned alongside it.
+    """
+    stop_words = _stop_words()
+    vocabulary = {}
+    rows: List[int] = []
+    cols: List[int] = []
+    lengths = np.zeros(len(sentences), dtype=np.float64)
+    for i, sentence in enumerate(sentences):
+        tokens = _WORD_RE.findall(sentence.lower())
+        lengths[i] = len(tokens)
+        for token in tokens:
+            if token not in stop_words:
+                rows.append(i)
+                cols.append(vocabulary.setdefault(token, len(vocabulary)))
+    counts = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float64), (rows, cols)),
+        shape=(len(sentences), len(vocabulary))
+    )
+    # Repeated (row, col) pairs are summed into term counts
+    counts.sum_duplicates()
+    return counts, lengths
+
+
+def frequency_scores(counts: sparse.csr_matrix, lengths: np.ndarray) -> np.ndarray:
+    """Sum of normalized corpus term frequencies per sentence, divided by sentence length."""
+    frequencies = np.asarray(counts.sum(axis=0)).ravel()
+    if frequencies.size == 0:
+        return np.zeros(counts.shape[0])
+    frequencies /= frequencies.max()
+    return (counts @ frequencies) / np.maximum(lengths, 1)
+
+
+def textrank_scores(counts: sparse.csr_matrix, damping: float = 0.85,
+                    max_iter: int = 100, tol: float = 1e-6) -> np.ndarray:
+    """PageRank over the sentence graph, with edges weighted by the cosine similarity of
+    the sentences' TF-IDF rows.
+
+    The similarity matrix ``N @ N.T`` is never built: each iteration multiplies through
+    the normalized term matrix ``N`` instead, so time and memory stay linear in the
+    number of matrix entries however densely the sentences overlap.
+    """
+    n = counts.shape[0]
+    document_frequency = np.bincount(counts.indices, minlength=counts.shape[1])
+    idf = np.log(n / np.maximum(document_frequency, 1)) + 1
+    weighted = sparse.csr_matrix(counts.multiply(idf))
+    norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+    normalized = sparse.diags(np.where(norms > 0, 1.0 / np.where(norms > 0, norms, 1.0), 0.0)) @ weighted
+    normalized_t = normalized.T.tocsr()
+    # A sentence's similarity with itself (1, or 0 for empty rows) is not an edge
+    self_similarity = (norms > 0).astype(np.float64)
+
+    def similarity_times(vector: np.ndarray) -> np.ndarray:
+        return normalized @ (normalized_t @ vector) - self_similarity * vector
+
+    out_weight = similarity_times(np.ones(n))
+    dangling = out_weight <= 1e-12
+    inverse_out_weight = np.where(dangling, 0.0, 1.0 / np.where(dangling, 1.0, out_weight))
+
+    scores = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        # Rank held by sentences without edges is spread evenly over the graph
+        updated = (1 - damping) / n + damping * (
+            similarity_times(scores * inverse_out_weight) + scores[dangling].sum() / n
+        )
+        converged = np.abs(updated - scores).sum() < tol
+        scores = updated
+        if converged:
+            break
+    return scores
+
+
+def extractive_summary(text: str, num_sentences: int = 15, method: str = "frequency") -> str:
+    """Bullet-point summary of the ``num_sentences`` highest scoring sentences, in text order."""
+    from nltk.tokenize import sent_tokenize
+
+    if method not in METHODS:
+        raise ValueError(f"Unknown extractive summary method {method!r}; expected one of {', '.join(METHODS)}")
+
+    sentences = sent_tokenize(text)
+    if len(sentences) <= num_sentences:
+        return "\n\n".join(sentences)
+
+    counts, lengths = term_matrix(sentences)
+    if method == "textrank":
+        scores = textrank_scores(counts)
+    else:
+        scores = frequency_scores(counts, lengths)
+
+    # Stable sort keeps the earlier sentence on ties
+    top_indices = np.sort(np.argsort(-scores, kind="stable")[:num_sentences])
+    bullets = [f"• {sentences[i].strip()}" for i in top_indices if sentences[i].strip()]
+    return "\n\n".join(bullets)
@@ -0,0 +1,134 @@
+# jobs.py
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue already holds its maximum number of pending jobs."""
+
+
+class Job:
+    def __init__(self, kind: str):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = QUEUED
+        self.stage = QUEUED
+        self.progress = 0.0
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def update(self, progress: Optional[float] = None, stage: Optional[str] = None):
+        """Report progress (0.0 - 1.0) and the current stage from inside a running job."""
+        if progress is not None:
+            self.progress = max(0.0, min(1.0, progress))
+        if stage is not None:
+            self.stage = stage
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": round(self.progress, 3),
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobQueue:
+    """Runs blocking work on a bounded thread pool so it never stalls the event loop."""
+
+    def __init__(self, max_workers: int = 1, max_pending: int = 32, retention_seconds: int = 3600):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.retention_seconds = retention_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job-worker")
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, fn: Callable[..., Any], *args, **kwargs) -> Job:
+        """Queue ``fn(job, *args, **kwargs)`` and return its job handle immediately."""
+        with self._lock:
+            self._prune()
+            if self._pending_count() >= self.max_pending:
+                raise QueueFullError(f"Too many pending {kind} jobs, please retry later")
+            job = Job(kind)
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        logger.info(f"Queued {kind} job {job.id}")
+        return job
+
+    def complete(self, kind: str, result: Any) -> Job:
+        """Register a job whose result is already known, e.g. a cache hit."""
+        job = Job(kind)
+        job.status = DONE
+        job.stage = DONE
+        job.progress = 1.0
+        job.result = result
+        job.started_at = job.finished_at = job.created_at
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+            return counts
+
+    def shutdown(self, wait: bool = False):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _run(self, job: Job, fn: Callable[..., Any], args, kwargs):
+        job.status = RUNNING
+        job.stage = RUNNING
+        job.started_at = time.time()
+        try:
+            job.result = fn(job, *args, **kwargs)
+            job.status = DONE
+            job.stage = DONE
+            job.progress = 1.0
+            logger.info(f"{job.kind} job {job.id} finished in {time.time() - job.started_at:.1f}s")
+        except Exception as e:
+            job.error = str(e)
+            job.status = FAILED
+            job.stage = FAILED
+            logger.error(f"{job.kind} job {job.id} failed: {str(e)}", exc_info=True)
+        finally:
+            job.finished_at = time.time()
+
+    def _pending_count(self) -> int:
+        return sum(1 for job in self._jobs.values() if job.status in (QUEUED, RUNNING))
+
+    def _prune(self):
+        # Drop finished jobs once their results have been retained long enough
+        cutoff = time.time() - self.retention_seconds
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
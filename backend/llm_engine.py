@@ -0,0 +1,134 @@
+# llm_engine.py
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Dict, Iterator, List, Optional
+
+from langchain_core.language_models.llms import LLM
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STOP = ["Question:", "Context:", "Instructions:"]
+
+# Marks the end of a streamed generation on its token queue
+_END_OF_STREAM = object()
+
+
+class LLMEngine:
+    """A small fixed pool of llama.cpp models shared by every paper.
+
+    Generation requests are queued FIFO; each pool worker owns one model and runs one
+    request at a time, so memory and CPU use stay flat however many papers are loaded.
+    """
+
+    def __init__(self, model_path: str, pool_size: int = 1, n_threads: int = 6, n_ctx: int = 2048):
+        from langchain_community.llms import LlamaCpp
+
+        self.model_path = model_path
+        self.pool_size = pool_size
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._workers: List[threading.Thread] = []
+        threads_per_model = max(1, n_threads // pool_size)
+
+        for i in range(pool_size):
+            llm = LlamaCpp(
+                model_path=model_path,
+                n_ctx=n_ctx,
+                temperature=0.3,
+                top_p=0.95,
+                top_k=40,
+                n_threads=threads_per_model,
+                repeat_penalty=1.1,
+                verbose=False,
+                f16_kv=True
+            )
+            worker = threading.Thread(target=self._work, args=(llm,), name=f"llm-engine-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+        logger.info(f"LLM engine started with {pool_size} model(s) from {model_path}")
+
+    def submit(self, prompt: str, stop: Optional[List[str]] = None) -> Future:
+        future: Future = Future()
+        self._queue.put((prompt, stop or DEFAULT_STOP, future, None, None))
+        return future
+
+    def stream(self, prompt: str, stop: Optional[List[str]] = None) -> Iterator[str]:
+        """Queue a generation and yield its tokens as the worker produces them."""
+        future: Future = Future()
+        tokens: "queue.Queue[Any]" = queue.Queue()
+        cancelled = threading.Event()
+        self._queue.put((prompt, stop or DEFAULT_STOP, future, tokens, cancelled))
+        try:
+            while True:
+                token = tokens.get()
+                if token is _END_OF_STREAM:
+                    break
+                yield token
+        finally:
+            # A consumer that stops early (e.g. a disconnected client) frees the worker
+            cancelled.set()
+        # Surface any generation error to the caller
+        future.result()
+
+    def generate(self, prompt: str, stop: Optional[List[str]] = None) -> str:
+        return self.submit(prompt, stop).result()
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def shutdown(self):
+        for _ in self._workers:
+            self._queue.put(None)
+
+    def _work(self, llm):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            prompt, stop, future, tokens, cancelled = item
+            if not future.set_running_or_notify_cancel():
+                if tokens is not None:
+                    tokens.put(_END_OF_STREAM)
+                continue
+            try:
+                if tokens is None:
+                    future.set_result(llm.invoke(prompt, stop=stop))
+                else:
+                    text = []
+                    for token in llm.stream(prompt, stop=stop):
+                        if cancelled.is_set():
+                            break
+                        text.append(token)
+                        tokens.put(token)
+                    future.set_result("".join(text))
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                if tokens is not None:
+                    tokens.put(_END_OF_STREAM)
+
+
+class SharedLlamaLLM(LLM):
+    """LangChain LLM that routes every call through a shared ``LLMEngine``."""
+
+    engine: Any
+
+    @property
+    def _llm_type(self) -> str:
+        return "shared-llama-cpp"
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> str:
+        return self.engine.generate(prompt, stop=stop)
+
+
+_engines: Dict[str, LLMEngine] = {}
+_engines_lock = threading.Lock()
+
+
+def shared_engine(model_path: str, **kwargs) -> LLMEngine:
+    """Return the process-wide engine for ``model_path``, creating it on first use."""
+    with _engines_lock:
+        if model_path not in _engines:
+            _engines[model_path] = LLMEngine(model_path, **kwargs)
+        return _engines[model_path]
@@ -1,45 +1,55 @@
 from fastapi import FastAPI, Request, Form, HTTPException, File, UploadFile
-from fastapi.responses import FileResponse, StreamingResponse, JSONResponse
+from fastapi.responses import FileResponse, StreamingResponse, JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from youtube_transcript_api import YouTubeTranscriptApi, NoTranscriptFound
 import subprocess
 import os
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import importlib.util
 from dotenv import load_dotenv
-import whisper
-import tempfile
-import yt_dlp
 from gtts import gTTS
 import pyttsx3
 from pyttsx3 import init as pyttsx3_init
 import re
 import google.generativeai as genai
 import nltk 
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
-from sentence_transformers import SentenceTransformer
 from nltk.tokenize import sent_tokenize
-from nltk.corpus import stopwords
-from collections import Counter
-import string
 from deep_translator import GoogleTranslator
 import logging
-import fitz
-from langchain_community.vectorstores import FAISS
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_community.document_loaders import PyPDFLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.llms import LlamaCpp
-from langchain.chains import RetrievalQA
-from typing import List, Dict
+from typing import List, Dict, Optional
 from pathlib import Path
-import numpy as np
-import faiss  # PyMuPDF
-from rag_chatbot import RAGChatBot
+# Heavy libraries (whisper, transformers, langchain, faiss, llama_cpp) are imported
+# lazily by the model loaders and the endpoints that need them
+import metrics
+from metrics import timed_stage, observe_stage
+from profiling import ProfileStore, ProfilingMiddleware, WorkerProfiledRoute, profiled_in_worker, pstats_text
+from model_registry import ModelRegistry
+from pdf_ingest import extract_pages, full_text, preview_text
+from uploads import stored_upload, remove_stale_uploads, UploadTooLargeError, UploadLimitMiddleware
+from jobs import Job, JobQueue, QueueFullError, DONE, FAILED
+from transcript_cache import TranscriptCache
+from audio import acquire_audio
+from translation import load_nllb, translate_batched, translate_with_memory, translate_chunks, translate_aligned
+from translation_memory import TranslationMemory
+from paper_registry import PaperRegistry
+from answer_cache import SemanticAnswerCache
+from summary_cache import SummaryCache
+from extractive import extractive_summary
+from sections import SECTION_MARKERS, find_sections, sample_sections
+from summarizer import MapReduceSummarizer, GEMINI_MODEL_NAME, PAPER_MAP_PROMPT, PAPER_REDUCE_PROMPT
+from transcription import caption_segments, iter_whisper_segments, ParallelTranscriber
 
 # Setup logging for debugging purposes
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Load environment variables before any configuration is read
+load_dotenv()
+
 # Model paths
 TINY_LLAMA_PATH = os.path.join(os.path.dirname(__file__), "models", "tinyllama-1.1b-chat-v1.0.Q4_K_M.gguf")
 LLAMA_PATH = os.path.join(os.path.dirname(__file__), "models", "llama-2-7b-chat.Q4_K_M.gguf")
@@ -51,15 +61,16 @@ logger.info(f"Using model path: {MODEL_PATH}")
 models_dir = os.path.join(os.path.dirname(__file__), "models")
 os.makedirs(models_dir, exist_ok=True)
 
-# Check for required dependencies
-try:
-    import llama_cpp
-    import langchain
-    import langchain_community
-    logger.info("All required dependencies are installed")
-except ImportError as e:
-    logger.error(f"Missing required dependency: {str(e)}")
+# Check for required dependencies without paying for their import at startup
+missing_dependencies = [
+    name for name in ("llama_cpp", "langchain", "langchain_community")
+    if importlib.util.find_spec(name) is None
+]
+if missing_dependencies:
+    logger.error(f"Missing required dependency: {', '.join(missing_dependencies)}")
     logger.info("Please install required dependencies: pip install langchain-community langchain llama-cpp-python")
+else:
+    logger.info("All required dependencies are installed")
 
 if not os.path.exists(TINY_LLAMA_PATH) and not os.path.exists(LLAMA_PATH):
     logger.warning("No language models found")
@@ -87,6 +98,16 @@ logging.basicConfig(level=logging.INFO)
 from fastapi.responses import StreamingResponse
 from io import BytesIO
 
+# Upload bodies are capped as they arrive, before FastAPI spools them to disk. Added
+# before CORS so the 413 response still carries CORS headers.
+UPLOAD_MAX_MB = int(os.getenv("UPLOAD_MAX_MB", "50"))
+app.add_middleware(
+    UploadLimitMiddleware,
+    # Headroom for the multipart boundaries and part headers around the file
+    max_bytes=UPLOAD_MAX_MB * 1024 * 1024 + 64 * 1024,
+    paths=["/upload_paper"]
+)
+
 # CORS to connect with frontend
 # CORS setup to allow requests from the React frontend
 app.add_middleware(
@@ -101,6 +122,19 @@ app.add_middleware(
     allow_methods=["*"],  # Allow all methods (GET, POST, etc.)
     allow_headers=["*"],  # Allow all headers
 )
+# Request counts, latencies and in-flight gauges per route, exposed on /metrics
+app.add_middleware(metrics.MetricsMiddleware, router=app.router)
+
+# Opt-in profiling of single requests sent with an "X-Profile: cprofile|sample" header
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "0") == "1"
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(os.path.dirname(__file__), "profiles"))
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "50"))
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5"))
+profile_store = ProfileStore(PROFILE_DIR, max_files=PROFILE_MAX_FILES) if PROFILING_ENABLED else None
+if profile_store is not None:
+    app.add_middleware(ProfilingMiddleware, store=profile_store, sample_interval=PROFILE_SAMPLE_INTERVAL_MS / 1000)
+    # Sync endpoints run on the threadpool, out of sight of the event loop's cProfile
+    app.router.route_class = WorkerProfiledRoute
 # Make sure this is called before accessing environment variables
 
 @app.post("/gtts_speech")
@@ -119,16 +153,73 @@ async def gtts_speech(text: str = Form(...), lang: str = Form('en')):
         logger.error(f"gTTS speech generation failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"gTTS speech generation failed: {str(e)}")
 
-# Load Whisper model once
-whisper_model = whisper.load_model("base")  # You can use "medium" or "large" if needed
+# Models are loaded on first use and, if MODEL_IDLE_TTL_SECONDS is set, unloaded when idle
+MODEL_IDLE_TTL_SECONDS = float(os.getenv("MODEL_IDLE_TTL_SECONDS", "0"))
+model_registry = ModelRegistry(idle_ttl=MODEL_IDLE_TTL_SECONDS or None, on_load=metrics.observe_model_load)
+
+WHISPER_MODEL_NAME = os.getenv("WHISPER_MODEL", "base")  # You can use "medium" or "large" if needed
+
+def load_whisper_model():
+    import whisper
+    return whisper.load_model(WHISPER_MODEL_NAME)
+
+model_registry.register("whisper", load_whisper_model)
+
+# Whisper's decoder installs KV-cache hooks on the model instance, so two decodes on the
+# shared registry model would corrupt each other; every use of it holds this lock. Jobs
+# and streams both decode window by window and release it in between, so a long job
+# cannot keep a stream waiting for its whole recording.
+whisper_lock = threading.Lock()
+WHISPER_WINDOW_SECONDS = float(os.getenv("WHISPER_WINDOW_SECONDS", "30"))
+
+# Optionally split long recordings at silences and decode the chunks on a process pool
+WHISPER_PARALLEL_WORKERS = int(os.getenv("WHISPER_PARALLEL_WORKERS", "0"))
+WHISPER_CHUNK_SECONDS = float(os.getenv("WHISPER_CHUNK_SECONDS", "120"))
+parallel_transcriber = (
+    ParallelTranscriber(WHISPER_MODEL_NAME, WHISPER_PARALLEL_WORKERS, WHISPER_CHUNK_SECONDS)
+    if WHISPER_PARALLEL_WORKERS > 1 else None
+)
+
+# NLLB-200 model & tokenizer; NLLB_BACKEND selects fp32, int8 (dynamic quantization) or ct2
+NLLB_MODEL_NAME = "facebook/nllb-200-distilled-600M"
+NLLB_BACKEND = os.getenv("NLLB_BACKEND", "fp32")
+NLLB_CT2_DIR = os.getenv("NLLB_CT2_DIR", os.path.join(models_dir, "nllb-200-distilled-600M-ct2"))
+
+def load_nllb_model():
+    return load_nllb(NLLB_MODEL_NAME, backend=NLLB_BACKEND, ct2_dir=NLLB_CT2_DIR)
+
+model_registry.register("nllb", load_nllb_model)
 
-# Load NLLB-200 model & tokenizer
-model_name = "facebook/nllb-200-distilled-600M"
-tokenizer = AutoTokenizer.from_pretrained(model_name)
-model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
+# One llama.cpp engine (LLM_POOL_SIZE models, LLM_THREADS threads in total) serves every paper
+LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", "1"))
+LLM_THREADS = int(os.getenv("LLM_THREADS", "6"))
+
+def load_llm_engine():
+    from llm_engine import shared_engine
+    return shared_engine(MODEL_PATH, pool_size=LLM_POOL_SIZE, n_threads=LLM_THREADS)
+
+# Papers keep a handle on the engine, so it stays resident once loaded
+model_registry.register("llm", load_llm_engine, idle_ttl=0)
+
+# One embedding model serves ingestion and query embedding for every paper
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-mpnet-base-v2")
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+
+def load_embedding_service():
+    from embeddings import shared_embedding_service
+    return shared_embedding_service(EMBEDDING_MODEL, batch_size=EMBEDDING_BATCH_SIZE)
+
+model_registry.register("embeddings", load_embedding_service, idle_ttl=0)
+
+@app.get("/ready")
+async def readiness():
+    """Report which models are resident and how long each took to load."""
+    status = {"status": "ready", "models": model_registry.status()}
+    if status["models"]["embeddings"]["loaded"]:
+        status["embeddings"] = model_registry.get("embeddings").stats()
+    return status
 
 # Set up Gemini Pro API Key
-load_dotenv()
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 genai.configure(api_key=GOOGLE_API_KEY) # Make sure to set your Google API key
 
@@ -171,39 +262,149 @@ def extract_video_id(url: str) -> str:
         return match.group(1)
     raise ValueError("Invalid YouTube URL")
 
-# Function to download audio from YouTube using yt-dlp
-import glob
-
-def download_audio_from_youtube(youtube_url: str) -> str:
-    temp_dir = tempfile.mkdtemp()
-    # Use wildcard in outtmpl to let yt-dlp name the file
-    outtmpl = os.path.join(temp_dir, "%(id)s.%(ext)s")
-
-    ydl_opts = {
-        'format': 'bestaudio/best',
-        'outtmpl': outtmpl,
-        'quiet': True,
-        'postprocessors': [{
-            'key': 'FFmpegExtractAudio',
-            'preferredcodec': 'mp3',
-        }],
-    }
 
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-        ydl.download([youtube_url])
+# Transcription runs on a bounded worker pool so Whisper never blocks the event loop
+TRANSCRIBE_WORKERS = int(os.getenv("TRANSCRIBE_WORKERS", "1"))
+TRANSCRIBE_MAX_PENDING = int(os.getenv("TRANSCRIBE_MAX_PENDING", "32"))
+JOB_RETENTION_SECONDS = int(os.getenv("JOB_RETENTION_SECONDS", "3600"))
+transcription_jobs = JobQueue(
+    max_workers=TRANSCRIBE_WORKERS,
+    max_pending=TRANSCRIBE_MAX_PENDING,
+    retention_seconds=JOB_RETENTION_SECONDS
+)
 
-    # After download, find the mp3 file in temp_dir
-    audio_files = glob.glob(os.path.join(temp_dir, "*.mp3"))
-    if not audio_files:
-        logger.error(f"No audio file found in {temp_dir} after download")
-        raise FileNotFoundError(f"No audio file found in {temp_dir} after download")
+# Transcripts are cached on disk so repeated requests for a lecture skip captions and Whisper
+TRANSCRIPT_CACHE_PATH = os.getenv(
+    "TRANSCRIPT_CACHE_PATH",
+    os.path.join(os.path.dirname(__file__), "cache", "transcripts.sqlite3")
+)
+TRANSCRIPT_CACHE_MAX_MB = int(os.getenv("TRANSCRIPT_CACHE_MAX_MB", "512"))
+transcript_cache = TranscriptCache(TRANSCRIPT_CACHE_PATH, max_bytes=TRANSCRIPT_CACHE_MAX_MB * 1024 * 1024)
+
+@app.on_event("shutdown")
+def shutdown_job_queues():
+    transcription_jobs.shutdown()
+    model_registry.shutdown()
+    transcript_summarizer.shutdown()
+    paper_summarizer.shutdown()
+    if parallel_transcriber is not None:
+        parallel_transcriber.shutdown()
+    if _corpus_index is not None:
+        _corpus_index.checkpoint()
+
+def run_transcription(job: Job, video_url: str, video_id: str) -> dict:
+    """Fetch captions for the video, falling back to Whisper. Runs on a worker thread."""
+    # Try to extract from YouTube transcript
+    job.update(progress=0.05, stage="captions")
+    try:
+        with timed_stage("transcribe", "captions"):
+            transcript_list = YouTubeTranscriptApi.get_transcript(video_id)
+        transcript = " ".join([item["text"] for item in transcript_list])
+        segments = caption_segments(transcript_list)
+        logger.info("Transcript obtained from YouTube captions")
+        transcript_cache.put(video_id, WHISPER_MODEL_NAME, transcript, "captions", segments)
+        return {"transcript": transcript, "source": "captions", "segments": segments}
+    except Exception as e:
+        logger.warning(f"Failed to get transcript from YouTube captions: {str(e)}")
+        logger.info("Falling back to Whisper transcription")
+
+    # Use Whisper for transcription regardless of YouTube transcript availability
+    job.update(progress=0.1, stage="downloading")
+    acquired = acquire_audio(video_url)
+    observe_stage("transcribe", "download", acquired["stats"]["download_seconds"])
+    observe_stage("transcribe", "decode", acquired["stats"]["decode_seconds"])
+    logger.info("Audio acquired, starting Whisper transcription")
+    job.update(progress=0.4, stage="transcribing")
+    if parallel_transcriber is not None:
+        with timed_stage("transcribe", "whisper"):
+            result = parallel_transcriber.transcribe(acquired["audio"])
+        segments = result["segments"]
+    else:
+        segments = []
+        duration = acquired["stats"]["duration_seconds"] or 1.0
+        with model_registry.use("whisper") as whisper_model, timed_stage("transcribe", "whisper"):
+            windows = iter_whisper_segments(whisper_model, acquired["audio"], WHISPER_WINDOW_SECONDS, lock=whisper_lock)
+            for segment in windows:
+                segments.append(segment)
+                job.update(progress=0.4 + 0.6 * min(1.0, segment["end"] / duration))
+        result = {"text": " ".join(segment["text"] for segment in segments)}
+    logger.info("Whisper transcription completed successfully")
+    transcript_cache.put(video_id, WHISPER_MODEL_NAME, result["text"], "whisper", segments)
+    return {"transcript": result["text"], "source": "whisper", "segments": segments, "audio": acquired["stats"]}
+
+# At most TRANSCRIBE_WORKERS streams run at once, separately from the job queue; their
+# Whisper decoding takes turns with the queue's, one window at a time, on whisper_lock
+stream_slots = threading.BoundedSemaphore(TRANSCRIBE_WORKERS)
+
+def stream_transcription(video_url: str, video_id: str):
+    """Yield NDJSON events: a meta line, one line per segment, then a done (or error) line."""
+    def event(**payload) -> str:
+        return json.dumps(payload) + "\n"
+
+    cached = transcript_cache.get(video_id, WHISPER_MODEL_NAME)
+    if cached is not None:
+        yield event(type="meta", video_id=video_id, source=cached["source"], cached=True)
+        for segment in cached["segments"] or [{"start": None, "end": None, "text": cached["transcript"]}]:
+            yield event(type="segment", **segment)
+        yield event(type="done", source=cached["source"])
+        return
 
-    audio_path = audio_files[0]
-    logger.info(f"Audio file downloaded successfully: {audio_path}")
-    return audio_path
+    try:
+        with timed_stage("transcribe", "captions"):
+            transcript_list = YouTubeTranscriptApi.get_transcript(video_id)
+    except Exception as e:
+        logger.warning(f"Failed to get transcript from YouTube captions: {str(e)}")
+        transcript_list = None
+
+    if transcript_list is not None:
+        segments = caption_segments(transcript_list)
+        yield event(type="meta", video_id=video_id, source="captions", cached=False)
+        for segment in segments:
+            yield event(type="segment", **segment)
+        transcript = " ".join([item["text"] for item in transcript_list])
+        transcript_cache.put(video_id, WHISPER_MODEL_NAME, transcript, "captions", segments)
+        yield event(type="done", source="captions")
+        return
+
+    yield event(type="meta", video_id=video_id, source="whisper", cached=False)
+    segments = []
+    try:
+        with stream_slots, model_registry.use("whisper") as whisper_model:
+            acquired = acquire_audio(video_url)
+            observe_stage("transcribe", "download", acquired["stats"]["download_seconds"])
+            observe_stage("transcribe", "decode", acquired["stats"]["decode_seconds"])
+            windows = iter_whisper_segments(whisper_model, acquired["audio"], WHISPER_WINDOW_SECONDS, lock=whisper_lock)
+            for segment in windows:
+                segments.append(segment)
+                yield event(type="segment", **segment)
+    except Exception as e:
+        logger.error(f"Streaming Whisper transcription failed: {str(e)}", exc_info=True)
+        yield event(type="error", detail=f"Whisper transcription failed: {str(e)}")
+        return
+
+    transcript = " ".join(segment["text"] for segment in segments)
+    transcript_cache.put(video_id, WHISPER_MODEL_NAME, transcript, "whisper", segments)
+    yield event(type="done", source="whisper")
+
+@app.post("/transcribe/stream")
+async def transcribe_stream(request: TranscribeRequest):
+    """Stream the transcript segment by segment as newline-delimited JSON."""
+    logger.info(f"Received streaming transcription request for URL: {request.url}")
+    try:
+        video_id = extract_video_id(request.url)
+    except ValueError as e:
+        logger.error(f"Invalid YouTube URL: {str(e)}")
+        raise HTTPException(status_code=400, detail=f"Invalid YouTube URL: {str(e)}")
 
-@app.post("/transcribe")
+    # A sync generator is iterated on the threadpool, keeping the event loop free
+    return StreamingResponse(
+        stream_transcription(request.url, video_id),
+        media_type="application/x-ndjson"
+    )
+
+@app.post("/transcribe", status_code=202)
 async def transcribe(request: TranscribeRequest):
+    """Queue a transcription job and return its id right away."""
     video_url = request.url
     logger.info(f"Received transcription request for URL: {video_url}")
 
@@ -211,88 +412,52 @@ async def transcribe(request: TranscribeRequest):
         # Extract video ID from YouTube URL
         video_id = extract_video_id(video_url)
         logger.info(f"Extracted video ID: {video_id}")
-
-        # Try to extract from YouTube transcript
-        try:
-            transcript_list = YouTubeTranscriptApi.get_transcript(video_id)
-            transcript = " ".join([item["text"] for item in transcript_list])
-            logger.info("Transcript obtained from YouTube captions")
-            return {"transcript": transcript, "source": "captions"}
-        except Exception as e:
-            logger.warning(f"Failed to get transcript from YouTube captions: {str(e)}")
-            logger.info("Falling back to Whisper transcription")
-
-        # Use Whisper for transcription regardless of YouTube transcript availability
-        try:
-            audio_path = download_audio_from_youtube(video_url)
-            logger.info(f"Audio downloaded to {audio_path}, starting Whisper transcription")
-            result = whisper_model.transcribe(audio_path)
-            logger.info("Whisper transcription completed successfully")
-            return {"transcript": result["text"], "source": "whisper"}
-
-        except Exception as e:
-            logger.error(f"Whisper transcription failed: {str(e)}", exc_info=True)
-            raise HTTPException(status_code=500, detail=f"Whisper transcription failed: {str(e)}")
-
     except ValueError as e:
         logger.error(f"Invalid YouTube URL: {str(e)}")
         raise HTTPException(status_code=400, detail=f"Invalid YouTube URL: {str(e)}")
 
-    except Exception as e:
-        logger.error(f"Error processing the video: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"Error processing the video: {str(e)}")
+    cached = transcript_cache.get(video_id, WHISPER_MODEL_NAME)
+    if cached is not None:
+        logger.info(f"Transcript cache hit for {video_id} ({cached['source']})")
+        job = transcription_jobs.complete("transcribe", {**cached, "cached": True})
+        return {"job_id": job.id, "status": job.status}
+
+    try:
+        job = transcription_jobs.submit("transcribe", run_transcription, video_url, video_id)
+    except QueueFullError as e:
+        logger.warning(str(e))
+        raise HTTPException(status_code=503, detail=str(e))
+
+    return {"job_id": job.id, "status": job.status}
+
+@app.get("/transcribe/jobs/{job_id}")
+async def transcription_status(job_id: str):
+    """Report whether a transcription job is queued, running, done or failed."""
+    job = transcription_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Transcription job not found")
+    return job.to_dict()
+
+@app.get("/transcribe/jobs/{job_id}/result")
+async def transcription_result(job_id: str):
+    """Return the transcript of a finished job."""
+    job = transcription_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Transcription job not found")
+    if job.status == FAILED:
+        raise HTTPException(status_code=500, detail=f"Transcription failed: {job.error}")
+    if job.status != DONE:
+        return JSONResponse(status_code=202, content=job.to_dict())
+    return job.result
 
 
 # Function to extract key sentences as a fallback when API fails
-def local_extractive_summary(text, num_sentences=15):
+EXTRACTIVE_SUMMARY_METHOD = os.getenv("EXTRACTIVE_SUMMARY_METHOD", "frequency")  # or "textrank"
+
+def local_extractive_summary(text, num_sentences=15, method=None):
     """Create a simple extractive summary when API is unavailable."""
     print("Using local extractive summarization as fallback method")
-    
-    # Split into sentences
-    sentences = sent_tokenize(text)
-    
-    if len(sentences) <= num_sentences:
-        return "\n\n".join(sentences)
-    
-    # Calculate sentence scores using a simple frequency-based approach
-    stop_words = set(stopwords.words('english'))
-    word_frequencies = Counter()
-    
-    # Preprocess and count word frequencies
-    for sentence in sentences:
-        for word in nltk.word_tokenize(sentence.lower()):
-            if word not in stop_words and word not in string.punctuation:
-                word_frequencies[word] += 1
-    
-    # Normalize frequencies
-    max_frequency = max(word_frequencies.values()) if word_frequencies else 1
-    normalized_frequencies = {word: freq/max_frequency for word, freq in word_frequencies.items()}
-    
-    # Score sentences based on word frequencies
-    sentence_scores = {}
-    for i, sentence in enumerate(sentences):
-        score = 0
-        for word in nltk.word_tokenize(sentence.lower()):
-            if word in normalized_frequencies:
-                score += normalized_frequencies[word]
-        # Normalize by sentence length to avoid favoring long sentences
-        sentence_scores[i] = score / max(1, len(nltk.word_tokenize(sentence)))
-    
-    # Get indices of top sentences
-    top_indices = sorted(sentence_scores, key=sentence_scores.get, reverse=True)[:num_sentences]
-    
-    # Extract sentences in original order
-    top_indices.sort()
-    summary_sentences = [sentences[i] for i in top_indices]
-    
-    # Create bullet point summary
-    bullet_summary = []
-    for sentence in summary_sentences:
-        cleaned = sentence.strip()
-        if cleaned:
-            bullet_summary.append(f"• {cleaned}")
-    
-    return "\n\n".join(bullet_summary)
+    return extractive_summary(text, num_sentences=num_sentences, method=method or EXTRACTIVE_SUMMARY_METHOD)
 
 # Function to extract key points from text as a fallback
 def extract_key_points(text, max_length=10000):
@@ -303,22 +468,16 @@ def extract_key_points(text, max_length=10000):
         return text
     
     # First try to extract meaningful sections
-    # Look for patterns like "Topic:", "Chapter", "Section", or time markers
-    section_patterns = [
-        r'(?:Section|Chapter|Part|Topic|Module)\s*\d+:.*?(?=(?:Section|Chapter|Part|Topic|Module)\s*\d+:|$)',
-        r'\[\d+:\d+\].*?(?=\[\d+:\d+\]|$)',
-        r'\(\d+:\d+\).*?(?=\(\d+:\d+\)|$)',
-        r'\d+:\d+\s*-.*?(?=\d+:\d+\s*-|$)'
-    ]
-    
-    for pattern in section_patterns:
-        sections = re.findall(pattern, text, re.DOTALL)
-        if sections:
-            print(f"Found {len(sections)} sections using pattern")
+    # Look for patterns like "Topic:", "Chapter", "Section", or time markers,
+    # all found in a single pass over the text
+    sections = find_sections(text)
+    for kind in SECTION_MARKERS:
+        offsets = sections[kind]
+        if offsets:
+            print(f"Found {len(offsets)} sections using pattern")
             # Take the beginning, a sample from the middle, and the end
-            if len(sections) > 3:
-                selected = [sections[0], sections[len(sections)//2], sections[-1]]
-                combined = "\n\n".join(selected)
+            if len(offsets) > 3:
+                combined = sample_sections(text, offsets)
                 if len(combined) <= max_length:
                     return combined
     
@@ -329,25 +488,53 @@ def extract_key_points(text, max_length=10000):
 class SummarizeRequest(BaseModel):
     text: str
 
-# Summarize endpoint using Gemini Pro
-@app.post("/summarize")
-async def summarize(request: SummarizeRequest):
-    try:
-        # Define a more detailed prompt to guide the model's summary
-        prompt = f"""You are a helpful assistant that summarizes educational video transcripts.
+TRANSCRIPT_MAP_PROMPT = """You are a helpful assistant that summarizes educational video transcripts.
+    Summarize the following part of a transcript using bullet points, keeping every topic it covers:
+Transcript excerpt:
+{text}
+
+Summary of the excerpt:
+"""
+
+TRANSCRIPT_REDUCE_PROMPT = """You are a helpful assistant that summarizes educational video transcripts.
             Summarize the following transcript in 200-250 words using bullet points, covering all key topics clearly:
         Transcript:
-        {request.text}
+        {text}
 
         Summary (brief, concise, and focused on the key points):
         """
 
-        # Request to Gemini Pro API for summarization
-        model = genai.GenerativeModel("models/gemini-1.5-pro-latest")
-        response = model.generate_content(prompt)
-
-        # Extract the summarized content from the response
-        summary = response.text.strip()
+# Long transcripts and papers are summarized map-reduce style; chunk and final
+# summaries are cached by content hash so re-summarizing the same text is free
+SUMMARY_CACHE_PATH = os.getenv("SUMMARY_CACHE_PATH", os.path.join(os.path.dirname(__file__), "cache", "summaries.sqlite3"))
+SUMMARY_CACHE_MAX_ENTRIES = int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", "50000"))
+SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "6000"))
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", "4"))
+summary_cache = SummaryCache(SUMMARY_CACHE_PATH, max_entries=SUMMARY_CACHE_MAX_ENTRIES)
+
+def new_summarizer(map_prompt: str, reduce_prompt: str) -> MapReduceSummarizer:
+    return MapReduceSummarizer(
+        genai.GenerativeModel(GEMINI_MODEL_NAME),
+        map_prompt,
+        reduce_prompt,
+        cache=summary_cache,
+        model_name=GEMINI_MODEL_NAME,
+        chunk_tokens=SUMMARY_CHUNK_TOKENS,
+        max_concurrency=SUMMARY_CONCURRENCY
+    )
+
+transcript_summarizer = new_summarizer(TRANSCRIPT_MAP_PROMPT, TRANSCRIPT_REDUCE_PROMPT)
+paper_summarizer = new_summarizer(PAPER_MAP_PROMPT, PAPER_REDUCE_PROMPT)
+
+def is_quota_error(error_str: str) -> bool:
+    return "429" in error_str or "quota" in error_str.lower() or "rate limit" in error_str.lower()
+
+# Summarize endpoint using Gemini Pro; a sync endpoint, so the map stage runs off the event loop
+@app.post("/summarize")
+def summarize(request: SummarizeRequest):
+    try:
+        with timed_stage("summarize", "summarize"):
+            summary = transcript_summarizer.summarize(request.text)
         return {"summary": summary}
     
     except Exception as e:
@@ -355,8 +542,11 @@ async def summarize(request: SummarizeRequest):
         print(f"Gemini summarization error: {error_str}")
         
         # If error is related to quota or rate limit, fallback to local extractive summary
-        if "429" in error_str or "quota" in error_str.lower() or "rate limit" in error_str.lower():
-            local_summary = extract_key_points(request.text)
+        if is_quota_error(error_str):
+            metrics.GEMINI_QUOTA_ERRORS.inc()
+            metrics.EXTRACT_KEY_POINTS_FALLBACKS.inc()
+            with timed_stage("summarize", "extract_key_points"):
+                local_summary = extract_key_points(request.text)
             return {
                 "summary": f"""
 # Transcript Summary 
@@ -372,6 +562,14 @@ For full AI summarization, please try again later when API quota resets, or with
         else:
             raise HTTPException(status_code=500, detail=f"Error generating summary: {str(e)}")
 
+# Sentence-level translation memory shared by the Google and NLLB paths
+TRANSLATION_MEMORY_PATH = os.getenv(
+    "TRANSLATION_MEMORY_PATH",
+    os.path.join(os.path.dirname(__file__), "cache", "translation_memory.sqlite3")
+)
+TRANSLATION_MEMORY_MAX_ENTRIES = int(os.getenv("TRANSLATION_MEMORY_MAX_ENTRIES", "200000"))
+translation_memory = TranslationMemory(TRANSLATION_MEMORY_PATH, max_entries=TRANSLATION_MEMORY_MAX_ENTRIES)
+
 # -------------------------------
 # ✅ 1. Google Translate (Fast)
 # -------------------------------
@@ -386,14 +584,67 @@ def split_text(text, max_length=5000):
     chunks.append(text)
     return chunks
 
+def pack_sentences(sentences, max_length=5000):
+    """Group sentences into newline-joined requests that stay under the Google Translate limit."""
+    groups = []
+    current = []
+    size = 0
+    for sentence in sentences:
+        if current and size + len(sentence) + 1 > max_length:
+            groups.append(current)
+            current, size = [], 0
+        current.append(sentence)
+        size += len(sentence) + 1
+    if current:
+        groups.append(current)
+    return groups
+
+# Google Translate requests run concurrently on a shared, bounded pool
+GOOGLE_TRANSLATE_CONCURRENCY = int(os.getenv("GOOGLE_TRANSLATE_CONCURRENCY", "4"))
+GOOGLE_TRANSLATE_RETRIES = int(os.getenv("GOOGLE_TRANSLATE_RETRIES", "3"))
+google_translate_pool = ThreadPoolExecutor(
+    max_workers=GOOGLE_TRANSLATE_CONCURRENCY,
+    thread_name_prefix="google-translate"
+)
+# GoogleTranslator keeps per-request state on the instance, so each thread reuses its own
+_google_translators = threading.local()
+
+def google_translator(target_language_code):
+    translators = getattr(_google_translators, "by_target", None)
+    if translators is None:
+        translators = _google_translators.by_target = {}
+    if target_language_code not in translators:
+        translators[target_language_code] = GoogleTranslator(source='auto', target=target_language_code)
+    return translators[target_language_code]
+
+def translate_google_group(group, target_language_code):
+    translator = google_translator(target_language_code)
+    if len(group) == 1 and len(group[0]) > 5000:
+        return [" ".join(translator.translate(chunk) for chunk in split_text(group[0]))]
+    # Google may merge or split lines; misaligned groups are retried in halves
+    return translate_aligned(translator.translate, group)
+
+def translate_google_sentences(sentences, target_language_code):
+    translated_groups = translate_chunks(
+        google_translate_pool,
+        pack_sentences(sentences),
+        lambda group: translate_google_group(group, target_language_code),
+        retries=GOOGLE_TRANSLATE_RETRIES
+    )
+    return [line for lines in translated_groups for line in lines]
+
 def translate_deep(text, target_language_code):
     try:
-        chunks = split_text(text)
-        translated_chunks = [
-            GoogleTranslator(source='auto', target=target_language_code).translate(chunk)
-            for chunk in chunks
-        ]
-        return "\n\n".join(translated_chunks)
+        sentences = [sentence.strip() for sentence in sent_tokenize(text)]
+        sentences = [sentence for sentence in sentences if sentence]
+        def translate_misses(misses):
+            with timed_stage("translate", "google"):
+                return translate_google_sentences(misses, target_language_code)
+
+        translated_sentences = translate_with_memory(
+            translation_memory, sentences, target_language_code, "google", translate_misses
+        )
+        return " ".join(translated_sentences)
     except Exception as e:
         print("Deep Translate error:", e)
         return "Translation failed using Google Translate."
@@ -401,30 +652,29 @@ def translate_deep(text, target_language_code):
 # -----------------------------------
 # ✅ 2. NLLB-200 (Offline, Accurate)
 # -----------------------------------
+NLLB_BATCH_SIZE = int(os.getenv("NLLB_BATCH_SIZE", "16"))
+
 def translate_nllb(text, target_language_code):
     try:
         if target_language_code not in language_map:
             return "Unsupported language."
 
         target_lang = language_map[target_language_code]
-        sentences = sent_tokenize(text)
-        translated_sentences = []
-
-        for sentence in sentences:
-            sentence = sentence.strip()
-            if not sentence:
-                continue
-
-            tokenizer.src_lang = "eng_Latn"
-            encoded = tokenizer(sentence, return_tensors="pt", truncation=True)
-            generated_tokens = model.generate(
-                **encoded,
-                forced_bos_token_id=tokenizer.lang_code_to_id[target_lang],
-                max_length=512
-            )
-            translated = tokenizer.decode(generated_tokens[0], skip_special_tokens=True)
-            translated_sentences.append(translated)
+        sentences = [sentence.strip() for sentence in sent_tokenize(text)]
+        sentences = [sentence for sentence in sentences if sentence]
+
+        def translate_misses(misses):
+            with model_registry.use("nllb") as (nllb_tokenizer, nllb_model), timed_stage("translate", "nllb"):
+                return translate_batched(
+                    nllb_tokenizer, nllb_model, misses, target_lang,
+                    source_lang="eng_Latn",
+                    batch_size=NLLB_BATCH_SIZE
+                )
 
+        # Keyed by backend, so switching NLLB_BACKEND does not serve the previous backend's output
+        translated_sentences = translate_with_memory(
+            translation_memory, sentences, target_language_code, f"nllb-{NLLB_BACKEND}", translate_misses
+        )
         return " ".join(translated_sentences)
 
     except Exception as e:
@@ -433,7 +683,7 @@ def translate_nllb(text, target_language_code):
 
 # Translation endpoint
 @app.post("/translate")
-async def translate(request: TranslateRequest):
+def translate(request: TranslateRequest):
     try:
         text = request.text
         target_language = request.target_language
@@ -456,23 +706,143 @@ async def translate(request: TranslateRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error translating text: {str(e)}")
 
+@app.get("/summary_cache/stats")
+async def summary_cache_stats():
+    """Report summary cache size and hit rate."""
+    return summary_cache.stats()
+
+@app.get("/translation_memory/stats")
+async def translation_memory_stats():
+    """Report translation memory size and hit rate."""
+    return translation_memory.stats()
 
-# Load environment variables
-load_dotenv()
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 
 # Initialize Gemini model
-genai.configure(api_key=GOOGLE_API_KEY)
 model = genai.GenerativeModel("models/gemini-1.5-pro-latest")
 
-# Initialize sentence transformer for embeddings
-sentence_model = SentenceTransformer("all-MiniLM-L6-v2")
+# Per-paper FAISS indexes, addressed by PDF content hash and embedding model
+VECTOR_INDEX_DIR = os.getenv("VECTOR_INDEX_DIR", os.path.join(os.path.dirname(__file__), "vectorstore"))
+VECTOR_INDEX_MAX_MB = int(os.getenv("VECTOR_INDEX_MAX_MB", "2048"))
+_vector_index_store = None
+
+def vector_index_store():
+    global _vector_index_store
+    if _vector_index_store is None:
+        from vector_index import VectorIndexStore
+        _vector_index_store = VectorIndexStore(VECTOR_INDEX_DIR, max_bytes=VECTOR_INDEX_MAX_MB * 1024 * 1024)
+    return _vector_index_store
+
+# One corpus-wide index over every paper's chunks, per embedding model
+CORPUS_INDEX_DIR = os.getenv("CORPUS_INDEX_DIR", os.path.join(os.path.dirname(__file__), "corpus_index"))
+CORPUS_ANN_THRESHOLD = int(os.getenv("CORPUS_ANN_THRESHOLD", "50000"))
+_corpus_index = None
+
+def corpus_index():
+    global _corpus_index
+    if _corpus_index is None:
+        from corpus_index import CorpusIndex
+        root = os.path.join(CORPUS_INDEX_DIR, re.sub(r"[^A-Za-z0-9_.-]", "_", EMBEDDING_MODEL))
+        _corpus_index = CorpusIndex(root, ann_threshold=CORPUS_ANN_THRESHOLD)
+    return _corpus_index
+
+# Near-duplicate questions on the same paper are answered from this cache instead of the LLM
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.92"))
+ANSWER_CACHE_TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "86400"))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "2000"))
+answer_cache = SemanticAnswerCache(
+    threshold=ANSWER_CACHE_THRESHOLD,
+    ttl_seconds=ANSWER_CACHE_TTL_SECONDS or None,
+    max_entries=ANSWER_CACHE_MAX_ENTRIES
+)
+
+# Exchanges of the conversation fed back into each prompt (TinyLlama has a 2048-token context)
+CHAT_MEMORY_TURNS = int(os.getenv("CHAT_MEMORY_TURNS", "2"))
+
+def new_chatbot():
+    """A RAGChatBot wired to the shared LLM engine, embeddings, vector index store and answer cache."""
+    from rag_chatbot import RAGChatBot
+    return RAGChatBot(
+        MODEL_PATH,
+        engine=model_registry.get("llm"),
+        embeddings=model_registry.get("embeddings"),
+        index_store=vector_index_store(),
+        answer_cache=answer_cache,
+        memory_turns=CHAT_MEMORY_TURNS
+    )
+
+# Uploaded papers and their chat history survive restarts; chatbots are rebuilt on demand
+PAPER_REGISTRY_PATH = os.getenv("PAPER_REGISTRY_PATH", os.path.join(os.path.dirname(__file__), "cache", "papers.sqlite3"))
+PAPER_CACHE_SIZE = int(os.getenv("PAPER_CACHE_SIZE", "8"))
+paper_registry = PaperRegistry(PAPER_REGISTRY_PATH, new_chatbot, max_loaded=PAPER_CACHE_SIZE)
+
+def get_paper_chatbot(pdf_id: str):
+    """Return the chatbot for ``pdf_id``, rehydrating it if needed; 404 for unknown ids.
+
+    Rehydration blocks, so call this from sync handlers or through ``run_in_threadpool``.
+    """
+    chatbot = paper_registry.get(pdf_id)
+    if chatbot is None:
+        logger.warning(f"PDF ID {pdf_id} not found")
+        raise HTTPException(status_code=404, detail="PDF not found. Please upload the paper first.")
+    return chatbot
 
-# Global variables to store RAGChatBot instances
-uploaded_pdfs = {}  # Store RAGChatBot instances for each PDF
-uploaded_papers_metadata = {}  # Store metadata for persistence (in-memory for now)
+# Uploads are copied to UPLOAD_DIR and removed once the paper has been indexed
+remove_stale_uploads(str(UPLOAD_DIR))
 
 # Route for uploading research papers
+@profiled_in_worker
+def index_uploaded_paper(filename: str, pdf_path: str, content_hash: str) -> dict:
+    """Parse, chunk and index a stored upload and register the paper. Blocking, so the
+    upload endpoint runs it on the threadpool."""
+    # Parse the PDF once; preview, chunking and summaries all reuse these pages
+    with timed_stage("upload", "parse"):
+        pages = extract_pages(pdf_path)
+
+    # Extract preview text (250-500 words) from PDF
+    preview = preview_text(pages, max_words=500)
+
+    try:
+        # Check if model file exists
+        if not os.path.exists(MODEL_PATH):
+            logger.error(f"Model file not found at {MODEL_PATH}")
+            raise HTTPException(
+                status_code=500,
+                detail="LLM model not found. Please ensure the model file is present in the models directory."
+            )
+
+        # Create a new RAGChatBot instance for this PDF
+        logger.info(f"Initializing RAGChatBot with model: {MODEL_PATH}")
+        chatbot = new_chatbot()
+
+        # Process the PDF
+        logger.info("Loading and processing PDF")
+        with timed_stage("upload", "chunk"):
+            docs = chatbot.load_pdf(pdf_path, pages=pages)
+        logger.info(f"PDF processed into {len(docs)} document chunks")
+
+        logger.info("Creating QA chain")
+        with timed_stage("upload", "index"):
+            chatbot.create_chain(docs, content_hash=content_hash)
+
+        # Make the paper searchable across the library, reusing its vectors
+        corpus = corpus_index()
+        if not corpus.has_paper(content_hash):
+            from corpus_index import vectors_from_faiss_store
+            with timed_stage("upload", "corpus_index"):
+                vectors, chunks = vectors_from_faiss_store(chatbot.vectorstore)
+                corpus.add_paper(content_hash, vectors, chunks)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error processing PDF: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Error processing PDF: {str(e)}")
+
+    # Store the processed PDF
+    pdf_id = paper_registry.add(filename, content_hash, pages, chatbot)
+    logger.info(f"PDF stored with ID: {pdf_id}")
+    return {"pdf_id": pdf_id, "preview_text": preview}
+
 @app.post("/upload_paper")
 async def upload_research_paper(file: UploadFile = File(...)):
     """Upload and process a research paper for RAG-based chatbot."""
@@ -483,66 +853,31 @@ async def upload_research_paper(file: UploadFile = File(...)):
         logger.warning(f"Invalid file type: {file.filename}")
         raise HTTPException(status_code=400, detail="Only PDF files are allowed")
 
+    # UploadLimitMiddleware has already capped the request body; this caps the file itself
+    max_bytes = UPLOAD_MAX_MB * 1024 * 1024
+
     try:
-        # Create a temporary file to save the uploaded PDF
+        # Copy the uploaded PDF to a temporary file, hashing it on the way
         logger.info("Creating temporary file for PDF")
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
-            content = await file.read()
-            temp_file.write(content)
-            temp_file_path = temp_file.name
-            logger.info(f"PDF saved to temporary file: {temp_file_path}")
-
-        # Extract preview text (250-500 words) from PDF
-        loader = PyPDFLoader(temp_file_path)
-        docs = loader.load()
-        full_text = " ".join([doc.page_content for doc in docs])
-        words = full_text.split()
-        preview_words = words[:500] if len(words) > 500 else words
-        preview_text = " ".join(preview_words)
-
-        try:
-            # Check if model file exists
-            if not os.path.exists(MODEL_PATH):
-                logger.error(f"Model file not found at {MODEL_PATH}")
-                raise HTTPException(
-                    status_code=500,
-                    detail="LLM model not found. Please ensure the model file is present in the models directory."
-                )
+        async with stored_upload(file, str(UPLOAD_DIR), max_bytes) as upload:
+            observe_stage("upload", "store", upload["seconds"])
+            logger.info(f"PDF saved to temporary file: {upload['path']}")
+            # Parsing, model loading and embedding all block, so none of it runs on the loop
+            paper = await run_in_threadpool(index_uploaded_paper, file.filename, upload["path"], upload["sha256"])
 
-            # Create a new RAGChatBot instance for this PDF
-            logger.info(f"Initializing RAGChatBot with model: {MODEL_PATH}")
-            chatbot = RAGChatBot(MODEL_PATH)
-            
-            # Process the PDF
-            logger.info("Loading and processing PDF")
-            docs = chatbot.load_pdf(temp_file_path)
-            logger.info(f"PDF processed into {len(docs)} document chunks")
-            
-            logger.info("Creating QA chain")
-            chatbot.create_chain(docs)
-
-            # Store the processed PDF
-            pdf_id = str(len(uploaded_pdfs) + 1)
-            uploaded_pdfs[pdf_id] = chatbot
-            uploaded_papers_metadata[pdf_id] = {
-                "filename": file.filename,
-                "path": temp_file_path
-            }
-            logger.info(f"PDF stored with ID: {pdf_id}")
-
-            return JSONResponse(
-                content={
-                    "message": "Research paper uploaded and processed successfully",
-                    "pdf_id": pdf_id,
-                    "preview_text": preview_text
-                },
-                status_code=200
-            )
-
-        except Exception as e:
-            logger.error(f"Error processing PDF: {str(e)}", exc_info=True)
-            raise HTTPException(status_code=500, detail=f"Error processing PDF: {str(e)}")
+        return JSONResponse(
+            content={
+                "message": "Research paper uploaded and processed successfully",
+                **paper
+            },
+            status_code=200
+        )
 
+    except UploadTooLargeError as e:
+        logger.warning(f"Rejected upload {file.filename}: {str(e)}")
+        raise HTTPException(status_code=413, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error handling file upload: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Error handling file upload: {str(e)}")
@@ -554,39 +889,34 @@ class ChatRequest(BaseModel):
 
 # Get chat history for a specific PDF
 @app.get("/chat_history/{pdf_id}")
-async def get_chat_history(pdf_id: str):
+def get_chat_history(pdf_id: str):
     """Get the chat history for a specific PDF."""
     logger = logging.getLogger(__name__)
     logger.info(f"Retrieving chat history for PDF {pdf_id}")
 
-    if pdf_id not in uploaded_pdfs:
-        logger.warning(f"PDF ID {pdf_id} not found")
-        raise HTTPException(status_code=404, detail="PDF not found")
-    
-    try:
-        chatbot = uploaded_pdfs[pdf_id]
-        history = chatbot.get_history()
-        logger.info(f"Retrieved {len(history)} chat history entries")
-        return JSONResponse(content={"history": history})
-    except Exception as e:
-        logger.error(f"Error retrieving chat history: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"Error retrieving chat history: {str(e)}")
+    # Read from the registry, so listing history does not rehydrate the chatbot
+    history = paper_registry.history(pdf_id)
+    if history is None:
+        raise HTTPException(status_code=404, detail="PDF not found. Please upload the paper first.")
+
+    logger.info(f"Retrieved {len(history)} chat history entries")
+    return JSONResponse(content={"history": history})
 
 @app.post("/answer")
-async def chat_with_paper(request: ChatRequest):
-    """Handle chat interactions with the uploaded research paper."""
+def chat_with_paper(request: ChatRequest):
+    """Handle chat interactions with the uploaded research paper.
+
+    A plain def, so FastAPI runs it on its threadpool: waiting on the shared engine
+    blocks one pool thread, not the event loop, and concurrent questions queue on it.
+    """
     logger = logging.getLogger(__name__)
     logger.info(f"Received question for PDF {request.pdf_id}: {request.question}")
 
-    if request.pdf_id not in uploaded_pdfs:
-        logger.warning(f"PDF ID {request.pdf_id} not found")
-        raise HTTPException(status_code=404, detail="PDF not found. Please upload the paper first.")
+    # Get the RAGChatBot instance for this PDF
+    logger.info("Retrieving chatbot instance")
+    chatbot = get_paper_chatbot(request.pdf_id)
 
     try:
-        # Get the RAGChatBot instance for this PDF
-        logger.info("Retrieving chatbot instance")
-        chatbot = uploaded_pdfs[request.pdf_id]
-        
         # Get response from the chatbot
         logger.info("Generating response")
         response = chatbot.ask(request.question)
@@ -608,8 +938,74 @@ async def chat_with_paper(request: ChatRequest):
         logger.error(f"Error generating response: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Error generating response: {str(e)}")
 
+def sse_events(events):
+    """Encode chatbot events as Server-Sent Events, using each event's type as the SSE event name."""
+    for event in events:
+        yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+    yield "event: done\ndata: {}\n\n"
+
+@app.get("/answer_cache/stats")
+async def answer_cache_stats():
+    """Report semantic answer cache size and hit rate."""
+    return answer_cache.stats()
+
+@app.post("/answer/stream")
+async def stream_answer(request: ChatRequest):
+    """Stream the answer token by token over SSE; page citations arrive as a final event."""
+    logger.info(f"Received streaming question for PDF {request.pdf_id}: {request.question}")
+
+    # Rehydrating an evicted paper re-chunks it and loads its index, so keep it off the loop
+    chatbot = await run_in_threadpool(profiled_in_worker(get_paper_chatbot), request.pdf_id)
+    # The sync generator runs on the threadpool, so waiting on the engine never blocks the loop
+    return StreamingResponse(
+        sse_events(chatbot.ask_stream(request.question)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 from fastapi import Query, Body
 
+class CorpusSearchRequest(BaseModel):
+    query: str
+    pdf_ids: Optional[List[str]] = None  # None searches the whole library
+    k: int = 5
+
+@app.post("/search_papers")
+def search_papers(request: CorpusSearchRequest):
+    """Search one paper, a selection of papers, or the whole library."""
+    logger.info(f"Received corpus search: {request.query} (papers: {request.pdf_ids or 'all'})")
+
+    paper_keys = None
+    if request.pdf_ids is not None:
+        hashes = paper_registry.content_hashes(request.pdf_ids)
+        unknown = [pdf_id for pdf_id in request.pdf_ids if pdf_id not in hashes]
+        if unknown:
+            raise HTTPException(status_code=404, detail=f"PDF not found: {', '.join(unknown)}")
+        paper_keys = list(set(hashes.values()))
+
+    try:
+        query_vector = model_registry.get("embeddings").embed_query(request.query)
+        hits = corpus_index().search(query_vector, k=request.k, paper_keys=paper_keys)
+
+        # Map content hashes back to the ids and filenames the client knows
+        papers_by_key = {}
+        for paper in paper_registry.list_papers():
+            papers_by_key.setdefault(paper["sha256"], []).append(paper)
+        results = []
+        for hit in hits:
+            papers = papers_by_key.get(hit["paper"], [])
+            results.append({
+                "pdf_ids": [paper["id"] for paper in papers],
+                "filename": papers[0]["filename"] if papers else None,
+                "page": hit["page"],
+                "text": hit["text"],
+                "score": hit["score"]
+            })
+        return JSONResponse(content={"results": results}, status_code=200)
+    except Exception as e:
+        logger.error(f"Error searching papers: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Error searching papers: {str(e)}")
+
 @app.get("/list_uploaded_papers")
 async def list_uploaded_papers():
     """Return a list of uploaded papers with metadata."""
@@ -617,12 +1013,10 @@ async def list_uploaded_papers():
     logger.info("Received request to list uploaded papers")
 
     try:
-        papers = []
-        for pdf_id, metadata in uploaded_papers_metadata.items():
-            papers.append({
-                "id": pdf_id,
-                "filename": metadata.get("filename", "Unknown")
-            })
+        papers = [
+            {"id": paper["id"], "filename": paper["filename"]}
+            for paper in paper_registry.list_papers()
+        ]
         logger.info(f"Returning {len(papers)} uploaded papers")
         return JSONResponse(content={"papers": papers}, status_code=200)
     except Exception as e:
@@ -630,34 +1024,33 @@ async def list_uploaded_papers():
         raise HTTPException(status_code=500, detail=f"Error listing uploaded papers: {str(e)}")
 
 @app.get("/paper-summary")
-async def get_paper_summary(pdf_id: str = Query(..., description="ID of the uploaded PDF")):
+def get_paper_summary(pdf_id: str = Query(..., description="ID of the uploaded PDF")):
     """Return a summary of the uploaded research paper."""
     logger = logging.getLogger(__name__)
     logger.info(f"Received request for paper summary for PDF ID: {pdf_id}")
 
-    if pdf_id not in uploaded_pdfs:
-        logger.warning(f"PDF ID {pdf_id} not found")
-        raise HTTPException(status_code=404, detail="PDF not found")
+    # The persisted pages are all a summary needs; no chatbot is rehydrated for it
+    pages = paper_registry.pages(pdf_id)
+    if pages is None:
+        raise HTTPException(status_code=404, detail="PDF not found. Please upload the paper first.")
 
     try:
-        chatbot = uploaded_pdfs[pdf_id]
-
         # Use summarizer.py's summarize_text on combined text
-        loader = PyPDFLoader(uploaded_papers_metadata[pdf_id]["path"])
-        docs = loader.load()
-        full_text = " ".join([doc.page_content for doc in docs])
         from summarizer import summarize_text
-        summary = summarize_text(full_text)
+        with timed_stage("paper_summary", "summarize"):
+            summary = summarize_text(full_text(pages), summarizer=paper_summarizer)
 
         logger.info("Returning paper summary")
         return JSONResponse(content={"summary": summary}, status_code=200)
 
     except Exception as e:
+        if is_quota_error(str(e)):
+            metrics.GEMINI_QUOTA_ERRORS.inc()
         logger.error(f"Error retrieving paper summary: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Error retrieving paper summary: {str(e)}")
 
 @app.post("/ask_question")
-async def ask_question(request: dict = Body(...)):
+def ask_question(request: dict = Body(...)):
     """Handle question asking about the uploaded research paper."""
     logger = logging.getLogger(__name__)
     question = request.get("question")
@@ -670,13 +1063,9 @@ async def ask_question(request: dict = Body(...)):
     if not pdf_id:
         raise HTTPException(status_code=400, detail="PDF ID is required")
 
-    if pdf_id not in uploaded_pdfs:
-        logger.warning(f"PDF ID {pdf_id} not found")
-        raise HTTPException(status_code=404, detail="PDF not found")
+    chatbot = get_paper_chatbot(pdf_id)
 
     try:
-        chatbot = uploaded_pdfs[pdf_id]
-
         # Get response from chatbot
         response = chatbot.ask(question)
         logger.info("Generated answer successfully")
@@ -689,3 +1078,60 @@ async def ask_question(request: dict = Body(...)):
     except Exception as e:
         logger.error(f"Error generating answer: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Error generating answer: {str(e)}")
+
+def component_stats():
+    """Cache, queue and model state, read from their own stats when /metrics is scraped."""
+    caches = {
+        "transcript": transcript_cache.stats(),
+        "translation_memory": translation_memory.stats(),
+        "summary": summary_cache.stats(),
+        "answer": answer_cache.stats(),
+    }
+    yield ("cache_hits", "Cache hits", "counter", ["cache"],
+           {(name,): stats["hits"] for name, stats in caches.items()})
+    yield ("cache_misses", "Cache misses", "counter", ["cache"],
+           {(name,): stats["misses"] for name, stats in caches.items()})
+    yield ("cache_entries", "Entries held by each cache", "gauge", ["cache"],
+           {(name,): stats["entries"] for name, stats in caches.items()})
+    yield ("transcription_jobs", "Transcription jobs by status", "gauge", ["status"],
+           {(status,): count for status, count in transcription_jobs.stats().items()})
+
+    models = model_registry.status()
+    yield ("model_loaded", "Whether each model is resident", "gauge", ["model"],
+           {(name,): int(model["loaded"]) for name, model in models.items()})
+    yield ("model_in_use", "Requests currently holding each model", "gauge", ["model"],
+           {(name,): model["in_use"] for name, model in models.items()})
+    yield ("model_loads", "Times each model has been loaded", "counter", ["model"],
+           {(name,): model["loads"] for name, model in models.items()})
+    if models["llm"]["loaded"]:
+        yield ("llm_queue_depth", "Generations waiting for an LLM worker", "gauge", [],
+               {(): model_registry.get("llm").pending()})
+    yield ("papers_loaded", "Paper chatbots held in memory", "gauge", [],
+           {(): paper_registry.loaded_count()})
+
+metrics.stats_collector.add("components", component_stats)
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Stage timings, counters and gauges in Prometheus text format."""
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
+
+@app.get("/profiles")
+async def list_profiles():
+    """Stored request profiles, newest first."""
+    if profile_store is None:
+        raise HTTPException(status_code=404, detail="Profiling is disabled. Set PROFILING_ENABLED=1.")
+    return {"profiles": profile_store.list(), "max_files": profile_store.max_files}
+
+@app.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str, format: str = "raw"):
+    """Download one profile; ``format=text`` renders a cProfile dump as a pstats table."""
+    profile = profile_store.get(profile_id) if profile_store is not None else None
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "text" and profile["mode"] == "cprofile":
+        return Response(content=pstats_text(profile["file"]), media_type="text/plain")
+    media_type = "text/plain" if profile["mode"] == "sample" else "application/octet-stream"
+    return FileResponse(profile["file"], media_type=media_type, filename=os.path.basename(profile["file"]))
+
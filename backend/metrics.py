@@ -0,0 +1,156 @@
+# metrics.py
+import logging
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import CONTENT_TYPE_LATEST, ProcessCollector
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+logger = logging.getLogger(__name__)
+
+REGISTRY = CollectorRegistry()
+ProcessCollector(registry=REGISTRY)
+
+# Stages span milliseconds (cache lookups) to many minutes (Whisper on a long lecture)
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+REQUESTS = Counter(
+    "edutranscribe_requests_total", "HTTP requests by route, method and status code",
+    ["route", "method", "status"], registry=REGISTRY
+)
+REQUEST_SECONDS = Histogram(
+    "edutranscribe_request_seconds", "Time to handle a request, including streaming its body, by route",
+    ["route"], buckets=STAGE_BUCKETS, registry=REGISTRY
+)
+IN_FLIGHT = Gauge(
+    "edutranscribe_requests_in_flight", "Requests being handled, by route",
+    ["route"], registry=REGISTRY
+)
+STAGE_SECONDS = Histogram(
+    "edutranscribe_stage_seconds", "Time spent in each stage of a pipeline",
+    ["pipeline", "stage"], buckets=STAGE_BUCKETS, registry=REGISTRY
+)
+STAGES_IN_FLIGHT = Gauge(
+    "edutranscribe_stages_in_flight", "Pipeline stages currently running",
+    ["pipeline", "stage"], registry=REGISTRY
+)
+MODEL_LOAD_SECONDS = Histogram(
+    "edutranscribe_model_load_seconds", "Time to load a model into memory",
+    ["model"], buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300), registry=REGISTRY
+)
+EXTRACT_KEY_POINTS_FALLBACKS = Counter(
+    "edutranscribe_extract_key_points_fallbacks_total",
+    "Summaries produced locally by extract_key_points instead of Gemini", registry=REGISTRY
+)
+GEMINI_QUOTA_ERRORS = Counter(
+    "edutranscribe_gemini_quota_errors_total", "Gemini calls rejected for quota or rate limits", registry=REGISTRY
+)
+
+
+@contextmanager
+def timed_stage(pipeline: str, stage: str) -> Iterator[None]:
+    """Record how long the block takes as one observation of the stage histogram."""
+    in_flight = STAGES_IN_FLIGHT.labels(pipeline, stage)
+    in_flight.inc()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.labels(pipeline, stage).observe(time.perf_counter() - start)
+        in_flight.dec()
+
+
+def observe_stage(pipeline: str, stage: str, seconds: float):
+    """Record a stage whose duration was measured elsewhere (e.g. in a stats dict)."""
+    STAGE_SECONDS.labels(pipeline, stage).observe(seconds)
+
+
+def observe_model_load(model: str, seconds: float):
+    MODEL_LOAD_SECONDS.labels(model).observe(seconds)
+
+
+class StatsCollector:
+    """Exposes the ``stats()`` dicts caches, queues and registries already keep.
+
+    Values are read only when /metrics is scraped, so the hot paths pay nothing for them.
+    Each source yields ``(name, help, type, label names, {label values: value})`` tuples,
+    where type is ``"gauge"`` or ``"counter"``; a metric name must come from one source.
+    """
+
+    def __init__(self):
+        self._sources: Dict[str, Callable[[], Iterable]] = {}
+
+    def add(self, name: str, source: Callable[[], Iterable]):
+        self._sources[name] = source
+
+    def collect(self):
+        for source_name, source in list(self._sources.items()):
+            try:
+                samples = list(source())
+            except Exception as e:
+                logger.warning(f"Metrics source '{source_name}' failed: {str(e)}")
+                continue
+            for name, documentation, kind, labels, values in samples:
+                family_type = CounterMetricFamily if kind == "counter" else GaugeMetricFamily
+                family = family_type(f"edutranscribe_{name}", documentation, labels=labels)
+                for label_values, value in values.items():
+                    if value is not None:
+                        family.add_metric(list(label_values), value)
+                yield family
+
+
+class MetricsMiddleware:
+    """ASGI middleware counting requests and timing them until the last body chunk is sent.
+
+    Pure ASGI rather than ``BaseHTTPMiddleware``, so streamed responses (NDJSON, SSE)
+    stay in flight until they finish and no extra task is spawned per request.
+    """
+
+    def __init__(self, app, router):
+        self.app = app
+        self.router = router
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = self._route_label(scope)
+        in_flight = IN_FLIGHT.labels(route)
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUEST_SECONDS.labels(route).observe(time.perf_counter() - start)
+            REQUESTS.labels(route, scope["method"], str(status)).inc()
+            in_flight.dec()
+
+    def _route_label(self, scope) -> str:
+        # Route templates, not raw paths, so ids in URLs do not create new series
+        from starlette.routing import Match
+
+        for route in self.router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return route.path
+        return "unmatched"
+
+
+stats_collector = StatsCollector()
+REGISTRY.register(stats_collector)
+
+
+def render():
+    """The registry in Prometheus text format, with its content type."""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,126 @@
+# model_registry.py
+import gc
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class _Entry:
+    def __init__(self, loader: Callable[[], Any], idle_ttl: Optional[float]):
+        self.loader = loader
+        self.idle_ttl = idle_ttl
+        self.model: Any = None
+        self.loaded = False
+        self.users = 0
+        self.loads = 0
+        self.load_seconds: Optional[float] = None
+        self.last_used: Optional[float] = None
+        self.lock = threading.Lock()
+
+
+class ModelRegistry:
+    """Loads models on first use and optionally unloads them after sitting idle."""
+
+    def __init__(self, idle_ttl: Optional[float] = None, reap_interval: float = 60.0,
+                 on_load: Optional[Callable[[str, float], None]] = None):
+        self.idle_ttl = idle_ttl
+        self.reap_interval = reap_interval
+        # Called with (name, seconds) after every load, e.g. to record load times
+        self.on_load = on_load
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+        self._reaper: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def register(self, name: str, loader: Callable[[], Any], idle_ttl: Optional[float] = None):
+        """Register a loader. ``idle_ttl`` overrides the registry default; 0 keeps the model resident."""
+        with self._lock:
+            self._entries[name] = _Entry(loader, self.idle_ttl if idle_ttl is None else idle_ttl)
+            if self._reaper is None and any(entry.idle_ttl for entry in self._entries.values()):
+                self._reaper = threading.Thread(target=self._reap_loop, name="model-reaper", daemon=True)
+                self._reaper.start()
+
+    def get(self, name: str) -> Any:
+        """Return the model, loading it first if needed. Prefer ``use`` for long-running work."""
+        entry = self._entry(name)
+        with entry.lock:
+            self._ensure_loaded(name, entry)
+            entry.last_used = time.time()
+            return entry.model
+
+    @contextmanager
+    def use(self, name: str) -> Iterator[Any]:
+        """Hold the model for the duration of the block so it cannot be unloaded mid-use."""
+        entry = self._entry(name)
+        with entry.lock:
+            self._ensure_loaded(name, entry)
+            entry.users += 1
+        try:
+            yield entry.model
+        finally:
+            with entry.lock:
+                entry.users -= 1
+                entry.last_used = time.time()
+
+    def unload(self, name: str) -> bool:
+        entry = self._entry(name)
+        with entry.lock:
+            if not entry.loaded or entry.users:
+                return False
+            entry.model = None
+            entry.loaded = False
+        gc.collect()
+        logger.info(f"Unloaded model '{name}'")
+        return True
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            entries = dict(self._entries)
+        return {
+            name: {
+                "loaded": entry.loaded,
+                "in_use": entry.users,
+                "loads": entry.loads,
+                "load_seconds": entry.load_seconds,
+                "last_used": entry.last_used,
+                "idle_ttl": entry.idle_ttl or None,
+            }
+            for name, entry in entries.items()
+        }
+
+    def shutdown(self):
+        self._stopped.set()
+
+    def _entry(self, name: str) -> _Entry:
+        with self._lock:
+            if name not in self._entries:
+                raise KeyError(f"Unknown model '{name}'")
+            return self._entries[name]
+
+    def _ensure_loaded(self, name: str, entry: _Entry):
+        # Called with entry.lock held so concurrent first requests load the model only once
+        if entry.loaded:
+            return
+        logger.info(f"Loading model '{name}'")
+        start = time.perf_counter()
+        entry.model = entry.loader()
+        entry.load_seconds = round(time.perf_counter() - start, 3)
+        entry.loaded = True
+        entry.loads += 1
+        logger.info(f"Loaded model '{name}' in {entry.load_seconds}s")
+        if self.on_load is not None:
+            self.on_load(name, entry.load_seconds)
+
+    def _reap_loop(self):
+        while not self._stopped.wait(self.reap_interval):
+            now = time.time()
+            with self._lock:
+                entries = list(self._entries.items())
+            for name, entry in entries:
+                if (entry.idle_ttl and entry.loaded and not entry.users
+                        and entry.last_used is not None and now - entry.last_used > entry.idle_ttl):
+                    self.unload(name)
@@ -0,0 +1,166 @@
+# paper_registry.py
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PaperRegistry:
+    """Uploaded papers and their chat history, persisted in SQLite.
+
+    Chatbots are rebuilt on first access from the persisted pages, vector index and
+    history. At most ``max_loaded`` of them stay in memory; the least recently used one
+    is dropped when another paper is loaded.
+    """
+
+    def __init__(self, db_path: str, chatbot_factory: Callable[[], object], max_loaded: int = 8):
+        self.db_path = db_path
+        self.max_loaded = max_loaded
+        self._chatbot_factory = chatbot_factory
+        self._loaded: "OrderedDict[str, object]" = OrderedDict()
+        self._loading: Dict[str, threading.Lock] = {}
+        self._lock = threading.RLock()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS papers (
+                pdf_id TEXT PRIMARY KEY,
+                filename TEXT NOT NULL,
+                sha256 TEXT NOT NULL,
+                pages TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS chat_history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                pdf_id TEXT NOT NULL,
+                question TEXT NOT NULL,
+                answer TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_chat_history_pdf ON chat_history (pdf_id, id)")
+        self._conn.commit()
+
+    def add(self, filename: str, sha256: str, pages: List[Dict], chatbot) -> str:
+        """Persist a freshly processed paper and keep its chatbot loaded. Returns the new id."""
+        pdf_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO papers VALUES (?, ?, ?, ?, ?)",
+                (pdf_id, filename, sha256, json.dumps(pages), time.time())
+            )
+            self._conn.commit()
+            self._attach(pdf_id, chatbot)
+        return pdf_id
+
+    def exists(self, pdf_id: str) -> bool:
+        with self._lock:
+            if pdf_id in self._loaded:
+                return True
+            row = self._conn.execute("SELECT 1 FROM papers WHERE pdf_id = ?", (pdf_id,)).fetchone()
+        return row is not None
+
+    def get(self, pdf_id: str):
+        """Return the paper's chatbot, rehydrating it if needed, or None for unknown ids."""
+        with self._lock:
+            if pdf_id in self._loaded:
+                self._loaded.move_to_end(pdf_id)
+                return self._loaded[pdf_id]
+            loading_lock = self._loading.setdefault(pdf_id, threading.Lock())
+
+        # Rehydrate outside the registry lock so other papers stay available meanwhile
+        try:
+            with loading_lock:
+                return self._rehydrate(pdf_id)
+        finally:
+            # Dropped on every outcome, so unknown ids and failed loads leave nothing behind
+            with self._lock:
+                if self._loading.get(pdf_id) is loading_lock:
+                    del self._loading[pdf_id]
+
+    def _rehydrate(self, pdf_id: str):
+        with self._lock:
+            if pdf_id in self._loaded:
+                return self._loaded[pdf_id]
+            row = self._conn.execute(
+                "SELECT filename, sha256, pages FROM papers WHERE pdf_id = ?", (pdf_id,)
+            ).fetchone()
+            history = self._conn.execute(
+                "SELECT question, answer FROM chat_history WHERE pdf_id = ? ORDER BY id", (pdf_id,)
+            ).fetchall()
+        if row is None:
+            return None
+        filename, sha256, pages = row
+
+        start = time.perf_counter()
+        chatbot = self._chatbot_factory()
+        # The vector index is found by content hash, so only chunking is redone here
+        docs = chatbot.load_pdf(filename, pages=json.loads(pages))
+        chatbot.create_chain(docs, content_hash=sha256)
+        chatbot.restore_history([{"question": q, "answer": a} for q, a in history])
+        with self._lock:
+            self._attach(pdf_id, chatbot)
+        logger.info(f"Rehydrated paper {pdf_id} in {time.perf_counter() - start:.2f}s")
+        return chatbot
+
+    def list_papers(self) -> List[Dict[str, str]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT pdf_id, filename, sha256 FROM papers ORDER BY created_at"
+            ).fetchall()
+        return [{"id": pdf_id, "filename": filename, "sha256": sha256} for pdf_id, filename, sha256 in rows]
+
+    def pages(self, pdf_id: str) -> Optional[List[Dict]]:
+        """The paper's extracted pages, or None for unknown ids. Does not load a chatbot."""
+        with self._lock:
+            row = self._conn.execute("SELECT pages FROM papers WHERE pdf_id = ?", (pdf_id,)).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def history(self, pdf_id: str) -> Optional[List[Dict[str, str]]]:
+        """The paper's chat history, oldest first, or None for unknown ids. Does not load a chatbot."""
+        with self._lock:
+            if not self._conn.execute("SELECT 1 FROM papers WHERE pdf_id = ?", (pdf_id,)).fetchone():
+                return None
+            rows = self._conn.execute(
+                "SELECT question, answer FROM chat_history WHERE pdf_id = ? ORDER BY id", (pdf_id,)
+            ).fetchall()
+        return [{"question": question, "answer": answer} for question, answer in rows]
+
+    def content_hashes(self, pdf_ids: List[str]) -> Dict[str, str]:
+        """Map the known ids among ``pdf_ids`` to their content hashes."""
+        with self._lock:
+            placeholders = ",".join("?" * len(pdf_ids))
+            rows = self._conn.execute(
+                f"SELECT pdf_id, sha256 FROM papers WHERE pdf_id IN ({placeholders})", pdf_ids
+            ).fetchall() if pdf_ids else []
+        return dict(rows)
+
+    def record_exchange(self, pdf_id: str, question: str, answer: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO chat_history (pdf_id, question, answer, created_at) VALUES (?, ?, ?, ?)",
+                (pdf_id, question, answer, time.time())
+            )
+            self._conn.commit()
+
+    def loaded_count(self) -> int:
+        with self._lock:
+            return len(self._loaded)
+
+    def _attach(self, pdf_id: str, chatbot):
+        chatbot.on_exchange = lambda question, answer: self.record_exchange(pdf_id, question, answer)
+        self._loaded[pdf_id] = chatbot
+        self._loaded.move_to_end(pdf_id)
+        while len(self._loaded) > self.max_loaded:
+            evicted, _ = self._loaded.popitem(last=False)
+            logger.info(f"Evicted paper {evicted} from memory")
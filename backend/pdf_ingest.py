@@ -0,0 +1,44 @@
+# pdf_ingest.py
+import logging
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+def extract_pages(pdf_path: str) -> List[Dict]:
+    """Extract the text of every page with PyMuPDF in a single pass.
+
+    Pages are numbered from 0, matching the ``page`` metadata PyPDFLoader produced.
+    """
+    import fitz
+
+    pages = []
+    with fitz.open(pdf_path) as pdf:
+        for number, page in enumerate(pdf):
+            pages.append({"page": number, "text": page.get_text("text")})
+    logger.info(f"Extracted {len(pages)} pages from {pdf_path}")
+    return pages
+
+
+def full_text(pages: List[Dict]) -> str:
+    return " ".join(page["text"] for page in pages)
+
+
+def preview_text(pages: List[Dict], max_words: int = 500) -> str:
+    """First ``max_words`` words of the document, reading only as many pages as needed."""
+    words: List[str] = []
+    for page in pages:
+        words.extend(page["text"].split())
+        if len(words) >= max_words:
+            break
+    return " ".join(words[:max_words])
+
+
+def to_documents(pages: List[Dict], source: str):
+    """Wrap extracted pages as LangChain documents for chunking and indexing."""
+    from langchain_core.documents import Document
+
+    return [
+        Document(page_content=page["text"], metadata={"source": source, "page": page["page"]})
+        for page in pages
+    ]
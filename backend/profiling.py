@@ -0,0 +1,281 @@
+# profiling.py
+import asyncio
+import cProfile
+import functools
+import io
+import json
+import logging
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional
+
+from fastapi.routing import APIRoute
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_MODES = ("cprofile", "sample")
+
+# cProfile output is the binary pstats format (snakeviz, pstats); samples are collapsed
+# stacks, one "frame;frame;frame count" line each (flamegraph.pl, speedscope)
+PROFILE_EXTENSIONS = {"cprofile": ".pstats", "sample": ".folded"}
+
+# Set for the duration of a cprofile request. Context variables follow the request into
+# the threadpool, so work run there adds its own profile here to be merged into the dump.
+_worker_profiles: ContextVar[Optional[List[cProfile.Profile]]] = ContextVar("worker_profiles", default=None)
+
+
+def profiled_in_worker(func: Callable) -> Callable:
+    """Wrap a function run on the threadpool so a cprofile request also profiles it.
+
+    cProfile only sees the thread that enabled it, so each call gets its own profiler
+    on its worker thread. Only call the wrapper on the threadpool: on the event loop it
+    would replace the request's own profiler. Outside a cprofile request this is one
+    context lookup.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        profiles = _worker_profiles.get()
+        if profiles is None:
+            return func(*args, **kwargs)
+        profiler = cProfile.Profile()
+        # Wrapped calls nested in this one are already covered by its profiler
+        token = _worker_profiles.set(None)
+        profiler.enable()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profiler.disable()
+            _worker_profiles.reset(token)
+            profiles.append(profiler)
+    return wrapper
+
+
+class WorkerProfiledRoute(APIRoute):
+    """Route class that wraps sync endpoints with ``profiled_in_worker``.
+
+    Set it as the router's ``route_class`` before routes are declared.
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        if not asyncio.iscoroutinefunction(endpoint):
+            endpoint = profiled_in_worker(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+
+class StackSampler:
+    """Samples the Python stack of every other thread at a fixed wall-clock interval.
+
+    Unlike cProfile this also sees work handed to thread pools (sync endpoints, Whisper
+    chunks, Google Translate batches), at the cost of including whatever else the
+    process is doing at the same time. Stacks are rooted at the thread name so the two
+    are easy to tell apart.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.samples[";".join(reversed(stack))] += 1
+
+    def dump(self, path: str):
+        with open(path, "w", encoding="utf-8") as out:
+            for stack, count in self.samples.most_common():
+                out.write(f"{stack} {count}\n")
+
+
+class ProfileStore:
+    """A bounded ring of profile files on disk; the oldest are deleted past ``max_files``.
+
+    Each profile is a data file plus a ``.json`` sidecar with the request it came from.
+    """
+
+    def __init__(self, directory: str, max_files: int = 50):
+        self.directory = directory
+        self.max_files = max_files
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def new_id(self) -> str:
+        # Millisecond timestamp first, so ids sort by age
+        return f"{int(time.time() * 1000):013d}-{uuid.uuid4().hex[:8]}"
+
+    def data_path(self, profile_id: str, mode: str) -> str:
+        return os.path.join(self.directory, profile_id + PROFILE_EXTENSIONS[mode])
+
+    def save(self, profile_id: str, meta: Dict):
+        """Write the sidecar once the data file exists, then trim the ring."""
+        path = os.path.join(self.directory, profile_id + ".json")
+        with open(path + ".tmp", "w", encoding="utf-8") as out:
+            json.dump(meta, out)
+        os.replace(path + ".tmp", path)
+        with self._lock:
+            for old in self.list()[self.max_files:]:
+                self._remove(old["id"], old["mode"])
+
+    def list(self) -> List[Dict]:
+        """Metadata for every stored profile, newest first."""
+        profiles = []
+        for name in sorted(os.listdir(self.directory), reverse=True):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.directory, name), encoding="utf-8") as f:
+                    profiles.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return profiles
+
+    def get(self, profile_id: str) -> Optional[Dict]:
+        if not re.fullmatch(r"\d{13}-[0-9a-f]{8}", profile_id):
+            return None
+        try:
+            with open(os.path.join(self.directory, profile_id + ".json"), encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        meta["file"] = self.data_path(profile_id, meta["mode"])
+        return meta if os.path.exists(meta["file"]) else None
+
+    def _remove(self, profile_id: str, mode: str):
+        for path in (self.data_path(profile_id, mode), os.path.join(self.directory, profile_id + ".json")):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def pstats_text(path: str, sort: str = "cumulative", limit: int = 60) -> str:
+    """A cProfile dump rendered as the usual pstats table."""
+    out = io.StringIO()
+    stats = pstats.Stats(path, stream=out)
+    stats.strip_dirs().sort_stats(sort).print_stats(limit)
+    return out.getvalue()
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles single requests sent with an ``X-Profile`` header.
+
+    The header value picks the profiler: ``cprofile`` (deterministic) or ``sample``
+    (stack sampling of all threads). cprofile covers the event loop thread, where other
+    requests' coroutines also run, plus threadpool calls wrapped with
+    ``profiled_in_worker`` (sync endpoints, via ``WorkerProfiledRoute``); sync
+    dependencies and streamed sync iterators are only seen by ``sample``. Requests
+    without the header cost one scan of the header list. One request is profiled at a time; an
+    opted-in request arriving meanwhile runs unprofiled. The profile id is returned in
+    an ``X-Profile-Id`` response header.
+    """
+
+    def __init__(self, app, store: ProfileStore, sample_interval: float = 0.005):
+        self.app = app
+        self.store = store
+        self.sample_interval = sample_interval
+        self._busy = threading.Lock()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        mode = None
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                mode = value.decode("latin-1").strip().lower()
+                break
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+        if mode not in PROFILE_MODES:
+            mode = "cprofile"
+        if not self._busy.acquire(blocking=False):
+            logger.info(f"Profiler busy; not profiling {scope['method']} {scope['path']}")
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self._profiled(scope, receive, send, mode)
+        finally:
+            self._busy.release()
+
+    async def _profiled(self, scope, receive, send, mode: str):
+        profile_id = self.store.new_id()
+        status = 500
+
+        async def send_with_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        profiler = cProfile.Profile() if mode == "cprofile" else StackSampler(self.sample_interval)
+        worker_profiles: List[cProfile.Profile] = []
+        if mode == "cprofile":
+            token = _worker_profiles.set(worker_profiles)
+            profiler.enable()
+        else:
+            profiler.start()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            seconds = time.perf_counter() - start
+            if mode == "cprofile":
+                profiler.disable()
+                _worker_profiles.reset(token)
+            else:
+                profiler.stop()
+            self._store(profiler, worker_profiles, profile_id, mode, {
+                "id": profile_id,
+                "mode": mode,
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status,
+                "seconds": round(seconds, 4),
+                "worker_calls": len(worker_profiles),
+                "created_at": time.time(),
+            })
+
+    def _store(self, profiler, worker_profiles: List[cProfile.Profile], profile_id: str, mode: str, meta: Dict):
+        # A profile that cannot be written must not fail the request it describes
+        try:
+            if mode == "cprofile":
+                stats = pstats.Stats(profiler)
+                for worker_profile in worker_profiles:
+                    stats.add(worker_profile)
+                stats.dump_stats(self.store.data_path(profile_id, mode))
+            else:
+                profiler.dump(self.store.data_path(profile_id, mode))
+            self.store.save(profile_id, meta)
+        except OSError as e:
+            logger.warning(f"Could not save profile {profile_id}: {str(e)}")
+            return
+        logger.info(f"Profiled {meta['method']} {meta['path']} in {meta['seconds']:.3f}s as {profile_id}")
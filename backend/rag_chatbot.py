@@ -1,44 +1,108 @@
 # rag_chat.py
-from langchain_community.vectorstores import FAISS
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_community.document_loaders import PyPDFLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.llms import LlamaCpp
 from langchain.chains import RetrievalQA, ConversationalRetrievalChain
 from langchain.prompts import PromptTemplate
-from langchain.memory import ConversationBufferMemory
-from typing import List, Dict
+from langchain.memory import ConversationBufferWindowMemory
+from langchain_core.messages import get_buffer_string
+from langchain_core.callbacks import BaseCallbackHandler
+from typing import Any, Iterator, List, Dict, Optional
 import os
+import hashlib
 import logging
 import re
+import threading
+import time
+from metrics import observe_stage, timed_stage
+from llm_engine import LLMEngine, SharedLlamaLLM, shared_engine
+from embeddings import EmbeddingService, shared_embedding_service
+from vector_index import VectorIndexStore
+from answer_cache import SemanticAnswerCache, is_standalone
+from pdf_ingest import extract_pages, to_documents
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class _StageTimer(BaseCallbackHandler):
+    """Times the retriever and LLM runs inside the QA chain as answer pipeline stages."""
+
+    def __init__(self):
+        self._starts: Dict[Any, float] = {}
+
+    def on_retriever_start(self, serialized, query, *, run_id, **kwargs):
+        self._starts[run_id] = time.perf_counter()
+
+    def on_retriever_end(self, documents, *, run_id, **kwargs):
+        self._finish("retrieval", run_id)
+
+    def on_retriever_error(self, error, *, run_id, **kwargs):
+        self._starts.pop(run_id, None)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._starts[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._finish("generation", run_id)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._starts.pop(run_id, None)
+
+    def _finish(self, stage: str, run_id):
+        start = self._starts.pop(run_id, None)
+        if start is not None:
+            observe_stage("answer", stage, time.perf_counter() - start)
+
+
+_stage_timer = _StageTimer()
+
 class RAGChatBot:
-    def __init__(self, model_path: str):
+    def __init__(self, model_path: str, engine: Optional[LLMEngine] = None,
+                 embeddings: Optional[EmbeddingService] = None,
+                 index_store: Optional[VectorIndexStore] = None,
+                 answer_cache: Optional[SemanticAnswerCache] = None,
+                 memory_turns: int = 2):
         if not os.path.exists(model_path):
             raise FileNotFoundError(f"Model file not found at {model_path}")
         
         default_model = os.path.join(os.path.dirname(__file__), "models/tinyllama-1.1b-chat-v1.0.Q4_K_M.gguf")
         self.model_path = default_model if os.path.exists(default_model) else model_path
         
+        # All chatbots generate through one shared engine instead of loading their own weights
+        self.engine = engine
+        self.embeddings = embeddings
+        self.index_store = index_store or VectorIndexStore(os.path.join(os.path.dirname(__file__), "vectorstore"))
+        # Shared across chatbots and keyed by content hash, so re-uploads of a paper share answers
+        self.answer_cache = answer_cache
+        self.content_hash: Optional[str] = None
+        self.pages: List[Dict] = []
+        self.llm = None
+        self.vectorstore = None
+        self.retriever = None
+        self.prompt = None
         self.qa_chain = None
         self.history: List[Dict[str, str]] = []
-        self.memory = ConversationBufferMemory(
+        # Called with (question, answer) after every exchange, e.g. to persist it
+        self.on_exchange = None
+        # One chatbot serves every user of a paper; a turn reads the memory, generates and
+        # saves, and concurrent turns must not interleave in the memory or the history
+        self._turn_lock = threading.Lock()
+        # Only the last ``memory_turns`` exchanges go into the prompt, which has to fit the
+        # LLM's context window next to the retrieved chunks; ``history`` keeps them all
+        self.memory_turns = memory_turns
+        self.memory = ConversationBufferWindowMemory(
             memory_key="chat_history",
             return_messages=True,
             output_key='answer',
-            k=2
+            k=memory_turns
         )
         logger.info(f"RAGChatBot initialized with model: {self.model_path}")
 
-    def load_pdf(self, pdf_path: str):
+    def load_pdf(self, pdf_path: str, pages: Optional[List[Dict]] = None):
+        """Chunk the PDF. Pass ``pages`` from ``extract_pages`` to avoid parsing it again."""
         self.reset()
         try:
-            loader = PyPDFLoader(pdf_path)
-            docs = loader.load()
+            self.pages = pages if pages is not None else extract_pages(pdf_path)
+            docs = to_documents(self.pages, pdf_path)
             splitter = RecursiveCharacterTextSplitter(
                 chunk_size=500,
                 chunk_overlap=50,
@@ -51,39 +115,33 @@ class RAGChatBot:
             logger.error(f"Error loading PDF: {str(e)}", exc_info=True)
             raise
 
-    def create_chain(self, docs):
+    def create_chain(self, docs, content_hash: Optional[str] = None):
+        """Build the QA chain. ``content_hash`` identifies the PDF bytes; when omitted the
+        chunk text is hashed instead. Papers already indexed are not embedded again."""
         try:
-            embeddings = HuggingFaceEmbeddings(
-                model_name="sentence-transformers/all-mpnet-base-v2",
-                model_kwargs={'device': 'cpu'}
-            )
+            if self.embeddings is None:
+                self.embeddings = shared_embedding_service()
+            embeddings = self.embeddings
 
-            vectorstore_dir = os.path.join(os.path.dirname(__file__), "vectorstore")
-            
-            if os.path.exists(vectorstore_dir):
-                vectorstore = FAISS.load_local(vectorstore_dir, embeddings, allow_dangerous_deserialization=True)
-            else:
-                vectorstore = FAISS.from_documents(docs, embeddings)
-                os.makedirs(vectorstore_dir, exist_ok=True)
-                vectorstore.save_local(vectorstore_dir)
+            if content_hash is None:
+                digest = hashlib.sha256()
+                for doc in docs:
+                    digest.update(doc.page_content.encode("utf-8"))
+                content_hash = digest.hexdigest()
+            self.content_hash = content_hash
+
+            vectorstore = self.index_store.load_or_build(content_hash, docs, embeddings, embeddings.model_name)
+            self.vectorstore = vectorstore
 
             retriever = vectorstore.as_retriever(
                 search_type="similarity",
                 search_kwargs={"k": 3, "score_threshold": 0.5}
             )
 
-            llm = LlamaCpp(
-                model_path=self.model_path,
-                n_ctx=2048,
-                temperature=0.3,
-                top_p=0.95,
-                top_k=40,
-                n_threads=6,
-                repeat_penalty=1.1,
-                verbose=False,
-                f16_kv=True,
-                stop=["Question:", "Context:", "Instructions:"]
-            )
+            if self.engine is None:
+                self.engine = shared_engine(self.model_path)
+            llm = SharedLlamaLLM(engine=self.engine)
+            self.llm = llm
 
             template = r"""You are an expert research assistant having a conversation about a research paper. 
 You have deep understanding of the paper's content and can explain complex concepts in a clear, conversational way.
@@ -102,6 +160,8 @@ Answer:"""
                 template=template,
                 input_variables=["context", "chat_history", "question"]
             )
+            self.retriever = retriever
+            self.prompt = PROMPT
 
             self.qa_chain = ConversationalRetrievalChain.from_llm(
                 llm=llm,
@@ -115,41 +175,144 @@ Answer:"""
             raise
 
     def ask(self, query: str) -> str:
+        with self._turn_lock:
+            return self._ask(query)
+
+    def _ask(self, query: str) -> str:
         if not self.qa_chain:
             return "❗ PDF not uploaded or processed yet."
         try:
-            response = self.qa_chain.invoke({"question": query})
+            query_vector, cached = self._cached_answer(query)
+            if cached is not None:
+                result = self._format_answer(cached["answer"], cached["sources"])
+                self.memory.save_context({"question": query}, {"answer": cached["answer"]})
+                self._record(query, result)
+                return result
+
+            response = self.qa_chain.invoke({"question": query}, config={"callbacks": [_stage_timer]})
             if isinstance(response, dict):
-                result = response.get("answer", "")
-                source_docs = response.get("source_documents", [])
-                formatted_response = result + "\n\nSources:"
-                seen_pages = set()
-                page_sources = {}
-                for doc in source_docs:
-                    page_num = doc.metadata.get('page', None)
-                    if page_num is not None and page_num not in seen_pages:
-                        seen_pages.add(page_num)
-                        content = doc.page_content.strip()
-                        sentences = content.split('.')
-                        relevant_quote = None
-                        for sentence in sentences:
-                            if re.search(r'\d+|accuracy|algorithm|method|result', sentence.lower()):
-                                relevant_quote = sentence.strip()
-                                break
-                        if relevant_quote:
-                            page_sources[page_num] = relevant_quote
-                for page_num in sorted(page_sources.keys()):
-                    formatted_response += f"\n\nPage {page_num}:"
-                    formatted_response += f"\n• {page_sources[page_num]}"
-                result = formatted_response
+                answer = response.get("answer", "")
+                page_sources = self._page_sources(response.get("source_documents", []))
+                result = self._format_answer(answer, page_sources)
+                self._cache_answer(query, query_vector, answer, page_sources)
             else:
                 result = str(response)
-            self.history.append({"question": query, "answer": result})
+            self._record(query, result)
             return result
         except Exception as e:
             logger.error(f"Error generating answer: {str(e)}", exc_info=True)
             return f"⚠️ Error while generating answer: {str(e)}"
 
+    def ask_stream(self, query: str) -> Iterator[Dict[str, Any]]:
+        """Answer like ``ask`` but yield ``token`` events as the LLM generates them,
+        followed by one ``sources`` event carrying the page citations and full answer."""
+        with self._turn_lock:
+            yield from self._ask_stream(query)
+
+    def _ask_stream(self, query: str) -> Iterator[Dict[str, Any]]:
+        if not self.qa_chain:
+            yield {"type": "error", "detail": "❗ PDF not uploaded or processed yet."}
+            return
+        try:
+            query_vector, cached = self._cached_answer(query)
+            if cached is not None:
+                answer, page_sources = cached["answer"], cached["sources"]
+                yield {"type": "token", "text": answer}
+            else:
+                answer, page_sources = yield from self._generate_stream(query)
+                self._cache_answer(query, query_vector, answer, page_sources)
+
+            result = self._format_answer(answer, page_sources)
+            self.memory.save_context({"question": query}, {"answer": answer})
+            self._record(query, result)
+            yield {
+                "type": "sources",
+                "sources": [{"page": page, "quote": quote} for page, quote in sorted(page_sources.items())],
+                "answer": result
+            }
+        except Exception as e:
+            logger.error(f"Error streaming answer: {str(e)}", exc_info=True)
+            yield {"type": "error", "detail": f"⚠️ Error while generating answer: {str(e)}"}
+
+    def _generate_stream(self, query: str):
+        """Retrieve context and stream the LLM's tokens; returns the answer and its page sources."""
+        with timed_stage("answer", "retrieval"):
+            source_docs = self.retriever.invoke(query)
+        chat_history = get_buffer_string(self.memory.load_memory_variables({})["chat_history"])
+        prompt = self.prompt.format(
+            context="\n\n".join(doc.page_content for doc in source_docs),
+            chat_history=chat_history,
+            question=query
+        )
+
+        tokens = []
+        start = time.perf_counter()
+        for token in self.engine.stream(prompt):
+            tokens.append(token)
+            yield {"type": "token", "text": token}
+        observe_stage("answer", "generation", time.perf_counter() - start)
+        return "".join(tokens).strip(), self._page_sources(source_docs)
+
+    def _cached_answer(self, query: str):
+        """Embed the question and look it up; returns ``(query_vector, entry or None)``.
+
+        Only standalone questions are looked up (and so stored), whatever the memory holds:
+        the chatbot and its memory are shared by every user of the paper, while a
+        follow-up such as "and the second dataset?" depends on the history and could
+        otherwise match an unrelated earlier question about the same paper.
+        """
+        if self.answer_cache is None or self.content_hash is None or not is_standalone(query):
+            return None, None
+        with timed_stage("answer", "cache_lookup"):
+            query_vector = self.embeddings.embed_query(query)
+            cached = self.answer_cache.lookup(self.content_hash, query_vector)
+        if cached is not None:
+            logger.info(f"Answer cache hit (similarity {cached['score']:.3f} to {cached['question']!r})")
+        return query_vector, cached
+
+    def _cache_answer(self, query: str, query_vector, answer: str, page_sources: Dict[int, str]):
+        if query_vector is not None and answer:
+            self.answer_cache.store(self.content_hash, query, query_vector, answer, page_sources)
+
+    @staticmethod
+    def _page_sources(source_docs) -> Dict[int, str]:
+        """Pick one relevant quote per cited page."""
+        seen_pages = set()
+        page_sources = {}
+        for doc in source_docs:
+            page_num = doc.metadata.get('page', None)
+            if page_num is not None and page_num not in seen_pages:
+                seen_pages.add(page_num)
+                content = doc.page_content.strip()
+                sentences = content.split('.')
+                relevant_quote = None
+                for sentence in sentences:
+                    if re.search(r'\d+|accuracy|algorithm|method|result', sentence.lower()):
+                        relevant_quote = sentence.strip()
+                        break
+                if relevant_quote:
+                    page_sources[page_num] = relevant_quote
+        return page_sources
+
+    @staticmethod
+    def _format_answer(answer: str, page_sources: Dict[int, str]) -> str:
+        formatted_response = answer + "\n\nSources:"
+        for page_num in sorted(page_sources.keys()):
+            formatted_response += f"\n\nPage {page_num}:"
+            formatted_response += f"\n• {page_sources[page_num]}"
+        return formatted_response
+
+    def restore_history(self, history: List[Dict[str, str]]):
+        """Reload a persisted conversation into the history, and its last turns into the chain's memory."""
+        self.history = list(history)
+        for entry in history[-self.memory_turns:] if self.memory_turns else []:
+            self.memory.save_context({"question": entry["question"]}, {"answer": entry["answer"]})
+
+    def _record(self, query: str, result: str):
+        self.history.append({"question": query, "answer": result})
+        if self.on_exchange is not None:
+            self.on_exchange(query, result)
+
     def get_history(self) -> List[Dict[str, str]]:
         return self.history
 
@@ -171,13 +334,13 @@ Summary:"""
             retriever = self.qa_chain.retriever
             docs = retriever.invoke("")
             context_text = "\n\n".join([doc.page_content for doc in docs])
-            llm = self.qa_chain.llm_chain.llm
+            llm = self.llm
             prompt_template = PromptTemplate(
                 template=summary_prompt,
                 input_variables=["context"]
             )
             prompt = prompt_template.format(context=context_text)
-            summary_response = llm(prompt)
+            summary_response = llm.invoke(prompt)
             summary_text = summary_response.strip()
             return summary_text
         except Exception as e:
@@ -0,0 +1,70 @@
+# sections.py
+import re
+from typing import Dict, List
+
+# Marker kinds in the order extract_key_points prefers them:
+#   heading            "Section 2:", "Chapter 3:", "Part 1:", "Topic 4:", "Module 5:"
+#   bracket_timestamp  "[12:30]"
+#   paren_timestamp    "(12:30)"
+#   dash_timestamp     "12:30 -"
+SECTION_MARKERS = ("heading", "bracket_timestamp", "paren_timestamp", "dash_timestamp")
+
+HEADING_KEYWORDS = ("Section", "Chapter", "Part", "Topic", "Module")
+
+_DIGITS_RE = re.compile(r"\d+")
+_DASH_RE = re.compile(r"\s*-")
+
+
+def find_sections(text: str) -> Dict[str, List[int]]:
+    """Start offsets of every section marker in ``text``, grouped by marker kind.
+
+    Every marker contains ``<digits>:``, so the scan jumps from colon to colon and only
+    inspects the characters around each one. Each character is looked at a bounded
+    number of times, so the scan is linear however large the text and whatever it
+    contains. A section runs from its marker to the next marker of the same kind, or to
+    the end of the text.
+    """
+    offsets: Dict[str, List[int]] = {kind: [] for kind in SECTION_MARKERS}
+    colon = text.find(":")
+    while colon != -1:
+        digits_start = colon
+        while digits_start > 0 and text[digits_start - 1].isdecimal():
+            digits_start -= 1
+        if digits_start < colon:
+            _classify(text, digits_start, colon, offsets)
+        colon = text.find(":", colon + 1)
+    return offsets
+
+
+def _classify(text: str, digits_start: int, colon: int, offsets: Dict[str, List[int]]):
+    # A marker kind can match at most once per colon, so offsets stay sorted
+    keyword_end = digits_start
+    while keyword_end > 0 and text[keyword_end - 1].isspace():
+        keyword_end -= 1
+    for keyword in HEADING_KEYWORDS:
+        if text.startswith(keyword, keyword_end - len(keyword)) and keyword_end >= len(keyword):
+            offsets["heading"].append(keyword_end - len(keyword))
+            break
+
+    minutes = _DIGITS_RE.match(text, colon + 1)
+    if minutes is None:
+        return
+    opener = text[digits_start - 1] if digits_start > 0 else ""
+    closer = text[minutes.end()] if minutes.end() < len(text) else ""
+    if opener == "[" and closer == "]":
+        offsets["bracket_timestamp"].append(digits_start - 1)
+    elif opener == "(" and closer == ")":
+        offsets["paren_timestamp"].append(digits_start - 1)
+    elif _DASH_RE.match(text, minutes.end()):
+        offsets["dash_timestamp"].append(digits_start)
+
+
+def section_text(text: str, offsets: List[int], index: int) -> str:
+    end = offsets[index + 1] if index + 1 < len(offsets) else len(text)
+    return text[offsets[index]:end]
+
+
+def sample_sections(text: str, offsets: List[int]) -> str:
+    """The first, middle and last sections, sliced straight from their offsets."""
+    picks = [0, len(offsets) // 2, len(offsets) - 1]
+    return "\n\n".join(section_text(text, offsets, i) for i in picks)
@@ -1,17 +1,38 @@
 # summarize.py
 
 import os
+import re
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
 from dotenv import load_dotenv
 import google.generativeai as genai
 
+from metrics import timed_stage
+from summary_cache import SummaryCache, summary_key
+
 # Load environment variables
 load_dotenv()
 genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
 
-def summarize_text(text: str) -> str:
-    model = genai.GenerativeModel("models/gemini-1.5-pro-latest")
-    
-    prompt = f"""
+logger = logging.getLogger(__name__)
+
+GEMINI_MODEL_NAME = "models/gemini-1.5-pro-latest"
+
+# Rough English average; only used to keep chunks well inside the context window
+TOKENS_PER_WORD = 1.35
+
+PAPER_MAP_PROMPT = """
+You are a research assistant. Summarize the following excerpt of a research paper, keeping
+the problem statement, methods, experiments, numeric results and conclusions it mentions.
+
+Excerpt:
+{text}
+
+Summary of the excerpt:
+"""
+
+PAPER_REDUCE_PROMPT = """
 You are a research assistant. Read the following research paper text and provide a detailed summary based on:
 
 1. **Introduction** - What is the research about? What problem does it address?
@@ -25,5 +46,117 @@ Text:
 Provide the summary in a structured, readable format.
 """
 
-    response = model.generate_content(prompt)
-    return response.text
+
+def estimate_tokens(text: str) -> int:
+    return int(len(text.split()) * TOKENS_PER_WORD)
+
+
+def chunk_text(text: str, max_tokens: int) -> List[str]:
+    """Split ``text`` into chunks of at most ``max_tokens`` estimated tokens.
+
+    Chunks end on sentence boundaries where possible; unpunctuated text such as
+    auto-generated captions is split on word boundaries instead.
+    """
+    max_words = max(1, int(max_tokens / TOKENS_PER_WORD))
+    chunks: List[str] = []
+    current: List[str] = []
+    for sentence in re.split(r"(?<=[.!?])\s+", text.strip()):
+        words = sentence.split()
+        while len(words) > max_words:
+            if current:
+                chunks.append(" ".join(current))
+                current = []
+            chunks.append(" ".join(words[:max_words]))
+            words = words[max_words:]
+        if len(current) + len(words) > max_words:
+            chunks.append(" ".join(current))
+            current = []
+        current.extend(words)
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+class MapReduceSummarizer:
+    """Summarize arbitrarily long text within the model's context and quota limits.
+
+    The text is split into token-bounded chunks that are summarized concurrently (at most
+    ``max_concurrency`` requests in flight); the chunk summaries are then combined, and
+    reduced again if they are still too long, before one final call applies
+    ``reduce_prompt``. Text that fits in one chunk goes straight to the final call.
+
+    ``client`` is anything with ``generate_content(prompt)`` returning an object with a
+    ``text`` attribute, such as ``genai.GenerativeModel`` or a local stand-in. Chunk and
+    final summaries are cached by content hash when a ``SummaryCache`` is given.
+    """
+
+    def __init__(self, client, map_prompt: str, reduce_prompt: str,
+                 cache: Optional[SummaryCache] = None, model_name: str = GEMINI_MODEL_NAME,
+                 chunk_tokens: int = 6000, max_concurrency: int = 4, max_levels: int = 3):
+        self.client = client
+        self.map_prompt = map_prompt
+        self.reduce_prompt = reduce_prompt
+        self.cache = cache
+        self.model_name = model_name
+        self.chunk_tokens = chunk_tokens
+        self.max_levels = max_levels
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="summarize")
+
+    def summarize(self, text: str) -> str:
+        final_key = summary_key("final", self.model_name, self.map_prompt, self.reduce_prompt,
+                                str(self.chunk_tokens), text)
+        if self.cache is not None:
+            cached = self.cache.get(final_key)
+            if cached is not None:
+                logger.info("Summary cache hit")
+                return cached
+
+        combined = text
+        for level in range(self.max_levels):
+            if estimate_tokens(combined) <= self.chunk_tokens:
+                break
+            chunks = chunk_text(combined, self.chunk_tokens)
+            logger.info(f"Summarizing {len(chunks)} chunks (level {level + 1})")
+            with timed_stage("summarize", "map"):
+                combined = "\n\n".join(self._executor.map(self._summarize_chunk, chunks))
+
+        with timed_stage("summarize", "reduce"):
+            summary = self._generate(self.reduce_prompt, combined)
+        if self.cache is not None:
+            self.cache.put(final_key, summary)
+        return summary
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _summarize_chunk(self, chunk: str) -> str:
+        key = summary_key("map", self.model_name, self.map_prompt, chunk)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        summary = self._generate(self.map_prompt, chunk)
+        # Cached per chunk so a run cut short by quota errors resumes where it stopped
+        if self.cache is not None:
+            self.cache.put(key, summary)
+        return summary
+
+    def _generate(self, prompt: str, text: str) -> str:
+        response = self.client.generate_content(prompt.format(text=text))
+        return response.text.strip()
+
+
+_default_summarizer: Optional[MapReduceSummarizer] = None
+
+
+def summarize_text(text: str, summarizer: Optional[MapReduceSummarizer] = None) -> str:
+    global _default_summarizer
+    if summarizer is None:
+        if _default_summarizer is None:
+            _default_summarizer = MapReduceSummarizer(
+                genai.GenerativeModel(GEMINI_MODEL_NAME),
+                PAPER_MAP_PROMPT,
+                PAPER_REDUCE_PROMPT
+            )
+        summarizer = _default_summarizer
+    return summarizer.summarize(text)
@@ -0,0 +1,6 @@
+# conftest.py
+import os
+import sys
+
+# Backend modules import each other by plain name, as they do when uvicorn runs main.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
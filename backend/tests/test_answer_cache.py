@@ -0,0 +1,70 @@
+# test_answer_cache.py
+"""The semantic answer cache on a paper chatbot shared by several users."""
+import re
+import zlib
+
+import numpy as np
+import pytest
+
+from answer_cache import SemanticAnswerCache, is_standalone
+
+
+class StandInEmbeddings:
+    """Bag-of-words vectors, so questions differing in case or punctuation embed alike."""
+
+    def embed_query(self, text):
+        vector = np.zeros(64, dtype=np.float32)
+        for word in re.findall(r"[a-z]+", text.lower()):
+            vector[zlib.crc32(word.encode()) % 64] += 1
+        return vector
+
+
+@pytest.mark.parametrize("question", [
+    "What datasets were used to evaluate the method?",
+    "What is the main contribution of this paper?",
+    "How does the proposed model compare to BERT?",
+])
+def test_standalone_questions(question):
+    assert is_standalone(question)
+
+
+@pytest.mark.parametrize("question", [
+    "Why?",
+    "And the second dataset?",
+    "What about its accuracy?",
+    "How does that compare to the baseline?",
+    "Can you explain the previous answer?",
+])
+def test_follow_ups_depend_on_history(question):
+    assert not is_standalone(question)
+
+
+def test_second_users_near_duplicate_hits_after_earlier_exchanges(tmp_path):
+    pytest.importorskip("langchain")
+    from rag_chatbot import RAGChatBot
+
+    class StandInChain:
+        def __init__(self):
+            self.calls = 0
+
+        def invoke(self, inputs, config=None):
+            self.calls += 1
+            return {"answer": f"answer {self.calls}", "source_documents": []}
+
+    model = tmp_path / "model.gguf"
+    model.write_bytes(b"")
+    chatbot = RAGChatBot(str(model), embeddings=StandInEmbeddings(), index_store=object(),
+                         answer_cache=SemanticAnswerCache(threshold=0.95))
+    chatbot.qa_chain = StandInChain()
+    chatbot.content_hash = "paper"
+    # The shared memory is never empty once anyone has asked, or history was restored
+    chatbot.restore_history([{"question": "Hello", "answer": "Hi"}])
+
+    first = chatbot.ask("What datasets were used to evaluate the method?")
+    chatbot.ask("And how large is the second one?")
+    second = chatbot.ask("what datasets were used to evaluate the method")
+
+    assert chatbot.qa_chain.calls == 2
+    assert first == second
+    assert chatbot.answer_cache.stats()["hits"] == 1
+
@@ -0,0 +1,124 @@
+# test_corpus_index.py
+"""CorpusIndex persistence: the pending log, checkpoints, and recovery from torn writes."""
+import json
+import os
+
+import numpy as np
+import pytest
+
+faiss = pytest.importorskip("faiss")
+
+from corpus_index import METADATA_FILE, PENDING_FILE, CorpusIndex  # noqa: E402
+
+DIM = 8
+
+
+def paper(seed, n=4):
+    vectors = np.random.default_rng(seed).random((n, DIM), dtype=np.float32)
+    chunks = [{"page": i, "text": f"paper {seed} chunk {i}"} for i in range(n)]
+    return vectors, chunks
+
+
+def metadata_lines(root):
+    with open(os.path.join(root, METADATA_FILE), encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_reload_replays_pending_vectors(tmp_path):
+    index = CorpusIndex(str(tmp_path))
+    for seed in range(3):
+        index.add_paper(f"p{seed}", *paper(seed))
+
+    reloaded = CorpusIndex(str(tmp_path))
+
+    assert reloaded.size == 12
+    vectors, _ = paper(2)
+    hits = reloaded.search(vectors[1], k=1)
+    assert hits[0]["paper"] == "p2" and hits[0]["page"] == 1
+
+
+def test_reload_after_checkpoint_keeps_later_additions(tmp_path):
+    index = CorpusIndex(str(tmp_path))
+    index.add_paper("p0", *paper(0))
+    index.add_paper("p1", *paper(1))
+    index.checkpoint()
+    index.add_paper("p2", *paper(2))
+
+    reloaded = CorpusIndex(str(tmp_path))
+
+    assert reloaded.size == 12
+    for seed in range(3):
+        vectors, _ = paper(seed)
+        assert reloaded.search(vectors[3], k=1, paper_keys=[f"p{seed}"])[0]["text"] == f"paper {seed} chunk 3"
+
+
+def test_vectors_without_metadata_are_dropped_and_later_papers_stay_aligned(tmp_path):
+    index = CorpusIndex(str(tmp_path))
+    index.add_paper("p0", *paper(0))
+    index.add_paper("p1", *paper(1))
+    # A crash between the vector log append and the metadata append
+    with open(os.path.join(tmp_path, PENDING_FILE), "ab") as out:
+        out.write(paper(9)[0].tobytes())
+
+    reloaded = CorpusIndex(str(tmp_path))
+    assert reloaded.size == 8
+    reloaded.add_paper("p2", *paper(2))
+
+    again = CorpusIndex(str(tmp_path))
+    assert again.size == 12
+    vectors, _ = paper(2)
+    assert again.search(vectors[0], k=1)[0]["text"] == "paper 2 chunk 0"
+
+
+def test_metadata_without_vectors_is_truncated_on_disk(tmp_path):
+    index = CorpusIndex(str(tmp_path))
+    index.add_paper("p0", *paper(0))
+    index.add_paper("p1", *paper(1))
+    # Stale records, as left by metadata written ahead of its vectors
+    with open(os.path.join(tmp_path, METADATA_FILE), "a", encoding="utf-8") as out:
+        out.write(json.dumps({"paper": "lost", "page": 0, "text": "lost"}) + "\n")
+        out.write('{"paper": "lo')
+
+    reloaded = CorpusIndex(str(tmp_path))
+    assert reloaded.size == 8
+    assert len(metadata_lines(tmp_path)) == 8
+    reloaded.add_paper("p2", *paper(2))
+
+    again = CorpusIndex(str(tmp_path))
+    assert [chunk["paper"] for chunk in metadata_lines(tmp_path)] == ["p0"] * 4 + ["p1"] * 4 + ["p2"] * 4
+    vectors, _ = paper(2)
+    assert again.search(vectors[2], k=1)[0]["text"] == "paper 2 chunk 2"
+
+
+def test_torn_vector_append_is_ignored(tmp_path):
+    index = CorpusIndex(str(tmp_path))
+    index.add_paper("p0", *paper(0))
+    index.add_paper("p1", *paper(1))
+    with open(os.path.join(tmp_path, PENDING_FILE), "ab") as out:
+        out.write(b"\x00" * 6)
+
+    reloaded = CorpusIndex(str(tmp_path))
+    reloaded.add_paper("p2", *paper(2))
+
+    again = CorpusIndex(str(tmp_path))
+    assert again.size == 12
+    vectors, _ = paper(2)
+    assert again.search(vectors[1], k=1)[0]["text"] == "paper 2 chunk 1"
+
+
+def test_ivf_rebuild_persists_and_restricted_search_is_exact(tmp_path):
+    index = CorpusIndex(str(tmp_path), ann_threshold=200, exact_limit=8)
+    for seed in range(60):
+        index.add_paper(f"p{seed}", *paper(seed))
+    assert isinstance(index._index, faiss.IndexIVF)
+
+    reloaded = CorpusIndex(str(tmp_path), ann_threshold=200, exact_limit=8)
+    assert reloaded.size == 240
+    vectors, _ = paper(7)
+    # Few papers: searched exactly; many papers: selector with a widened probe
+    assert reloaded.search(vectors[2], k=1, paper_keys=["p7"])[0]["text"] == "paper 7 chunk 2"
+    many = [f"p{seed}" for seed in range(0, 60, 2)]
+    vectors, _ = paper(8)
+    hits = reloaded.search(vectors[2], k=3, paper_keys=many)
+    assert hits[0]["text"] == "paper 8 chunk 2"
+    assert all(hit["paper"] in many for hit in hits)
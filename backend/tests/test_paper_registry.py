@@ -0,0 +1,38 @@
+# test_paper_registry.py
+"""PaperRegistry's read accessors, which must not rehydrate a chatbot."""
+import pytest
+
+from paper_registry import PaperRegistry
+
+
+class StandInChatbot:
+    on_exchange = None
+
+
+@pytest.fixture
+def registry(tmp_path):
+    def factory():
+        raise AssertionError("accessors must not build a chatbot")
+
+    return PaperRegistry(str(tmp_path / "papers.sqlite3"), factory, max_loaded=1)
+
+
+def test_pages_and_history_are_read_without_a_chatbot(registry):
+    pages = [{"page": 1, "text": "Abstract"}, {"page": 2, "text": "Method"}]
+    pdf_id = registry.add("paper.pdf", "abc", pages, StandInChatbot())
+    registry.record_exchange(pdf_id, "What is it?", "A paper.")
+    registry.record_exchange(pdf_id, "And then?", "A method.")
+    # Evict it, so any rehydration would go through the failing factory
+    registry.add("other.pdf", "def", [], StandInChatbot())
+
+    assert registry.pages(pdf_id) == pages
+    assert registry.history(pdf_id) == [
+        {"question": "What is it?", "answer": "A paper."},
+        {"question": "And then?", "answer": "A method."},
+    ]
+    assert registry.loaded_count() == 1
+
+
+def test_unknown_ids_return_none(registry):
+    assert registry.pages("missing") is None
+    assert registry.history("missing") is None
@@ -0,0 +1,176 @@
+# test_summarizer.py
+"""MapReduceSummarizer against a local stand-in for the Gemini client."""
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("dotenv")
+pytest.importorskip("google.generativeai")
+
+from summarizer import MapReduceSummarizer, chunk_text, estimate_tokens  # noqa: E402
+from summary_cache import SummaryCache  # noqa: E402
+
+MAP_PROMPT = "MAP\n{text}"
+REDUCE_PROMPT = "REDUCE\n{text}"
+
+
+class StandInGemini:
+    """Shaped like ``genai.GenerativeModel``: ``generate_content(prompt).text``.
+
+    Map calls return the first ``summary_words`` words of the excerpt and reduce calls
+    return "final: " plus the word count. After ``quota`` successful calls every call
+    fails with Gemini's quota error. ``barrier`` makes map calls wait for each other.
+    """
+
+    def __init__(self, summary_words=5, quota=None, barrier=None):
+        self.summary_words = summary_words
+        self.quota = quota
+        self.barrier = barrier
+        self.mapped = []
+        self.reduced = []
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt):
+        kind, text = prompt.split("\n", 1)
+        if kind == "MAP" and self.barrier is not None:
+            self.barrier.wait(timeout=5)
+        with self._lock:
+            if self.quota is not None and len(self.mapped) + len(self.reduced) >= self.quota:
+                raise RuntimeError("429 Resource has been exhausted (e.g. check quota).")
+            if kind == "MAP":
+                self.mapped.append(text)
+                return SimpleNamespace(text=" ".join(text.split()[:self.summary_words]))
+            self.reduced.append(text)
+            return SimpleNamespace(text=f"final: {len(text.split())} words")
+
+
+def sentences(count, start=0):
+    """``count`` ten-word sentences with distinct words."""
+    return " ".join(
+        " ".join(f"w{n}x{k}" for k in range(9)) + f" end{n}."
+        for n in range(start, start + count)
+    )
+
+
+@pytest.fixture
+def make_summarizer():
+    made = []
+
+    def make(client, **kwargs):
+        summarizer = MapReduceSummarizer(client, MAP_PROMPT, REDUCE_PROMPT, **kwargs)
+        made.append(summarizer)
+        return summarizer
+
+    yield make
+    for summarizer in made:
+        summarizer.shutdown()
+
+
+def test_chunk_text_keeps_sentences_within_the_budget():
+    text = sentences(25)
+
+    chunks = chunk_text(text, max_tokens=135)
+
+    assert all(estimate_tokens(chunk) <= 135 for chunk in chunks)
+    assert all(chunk.endswith(".") for chunk in chunks)
+    assert " ".join(chunks).split() == text.split()
+
+
+def test_chunk_text_splits_unpunctuated_text_on_words():
+    text = " ".join(f"word{i}" for i in range(250))
+
+    chunks = chunk_text(text, max_tokens=135)
+
+    assert [len(chunk.split()) for chunk in chunks] == [100, 100, 50]
+    assert " ".join(chunks) == text
+
+
+def test_short_text_goes_straight_to_the_final_call(make_summarizer):
+    client = StandInGemini()
+    summarizer = make_summarizer(client, chunk_tokens=135)
+
+    assert summarizer.summarize(sentences(3)) == "final: 30 words"
+    assert client.mapped == []
+
+
+def test_map_stage_runs_chunks_concurrently(make_summarizer):
+    # Every map call waits until three are in flight, so this only finishes if they overlap
+    client = StandInGemini(barrier=threading.Barrier(3))
+    summarizer = make_summarizer(client, chunk_tokens=135, max_concurrency=3)
+
+    summarizer.summarize(sentences(60))
+
+    assert len(client.mapped) == 6
+    assert len(client.reduced) == 1
+
+
+def test_long_text_is_reduced_over_several_levels(make_summarizer):
+    # 10 chunks summarized to 15 words each still exceed one chunk, so they are mapped again
+    client = StandInGemini(summary_words=15)
+    summarizer = make_summarizer(client, chunk_tokens=135)
+
+    summary = summarizer.summarize(sentences(100))
+
+    assert len(client.mapped) == 12
+    assert len(client.reduced) == 1
+    assert estimate_tokens(client.reduced[0]) <= 135
+    assert summary == f"final: {len(client.reduced[0].split())} words"
+
+
+def test_max_levels_bounds_the_reduction(make_summarizer):
+    client = StandInGemini(summary_words=60)
+    summarizer = make_summarizer(client, chunk_tokens=135, max_levels=1)
+
+    summarizer.summarize(sentences(100))
+
+    assert len(client.mapped) == 10
+    assert len(client.reduced[0].split()) == 600
+
+
+def test_repeated_text_is_a_final_cache_hit(make_summarizer, tmp_path):
+    cache = SummaryCache(str(tmp_path / "summaries.sqlite3"))
+    client = StandInGemini()
+    summarizer = make_summarizer(client, cache=cache, chunk_tokens=135)
+    text = sentences(100)
+
+    first = summarizer.summarize(text)
+    calls = len(client.mapped) + len(client.reduced)
+    second = summarizer.summarize(text)
+
+    assert second == first
+    assert len(client.mapped) + len(client.reduced) == calls
+
+
+def test_unchanged_chunks_are_chunk_cache_hits(make_summarizer, tmp_path):
+    cache = SummaryCache(str(tmp_path / "summaries.sqlite3"))
+    client = StandInGemini()
+    summarizer = make_summarizer(client, cache=cache, chunk_tokens=135)
+    text = sentences(100)
+
+    summarizer.summarize(text)
+    # One more sentence adds an eleventh chunk; the first ten are unchanged
+    summarizer.summarize(text + " " + sentences(1, start=100))
+
+    assert len(client.mapped) == 11
+    assert len(client.reduced) == 2
+
+
+def test_resumes_after_a_quota_error_without_redoing_chunks(make_summarizer, tmp_path):
+    cache = SummaryCache(str(tmp_path / "summaries.sqlite3"))
+    client = StandInGemini(quota=4)
+    summarizer = make_summarizer(client, cache=cache, chunk_tokens=135, max_concurrency=2)
+    text = sentences(100)
+
+    with pytest.raises(RuntimeError, match="429"):
+        summarizer.summarize(text)
+    assert 0 < len(client.mapped) <= 4
+
+    # A fresh quota; map calls still in flight from the first run keep failing
+    summarizer.client = resumed = StandInGemini()
+    summarizer.summarize(text)
+
+    mapped = client.mapped + resumed.mapped
+    assert len(mapped) == 10
+    assert len(set(mapped)) == 10
+    assert len(resumed.reduced) == 1
@@ -0,0 +1,87 @@
+# test_translation.py
+"""translate_chunks and translate_aligned against a local stand-in translation service."""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from translation import translate_aligned, translate_chunks
+
+
+class StandInService:
+    """Upper-cases each line. Fails the first ``failures[text]`` calls for a given text,
+    and merges lines of any request containing a sentence listed in ``merge``."""
+
+    def __init__(self, failures=None, merge=()):
+        self.failures = dict(failures or {})
+        self.merge = set(merge)
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def translate(self, text):
+        with self._lock:
+            self.requests.append(text)
+            if self.failures.get(text, 0) > 0:
+                self.failures[text] -= 1
+                raise ConnectionError("service unavailable")
+        lines = text.split("\n")
+        if len(lines) > 1 and self.merge.intersection(lines):
+            return " ".join(lines).upper()
+        return "\n".join(line.upper() for line in lines)
+
+
+@pytest.fixture
+def pool():
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        yield executor
+
+
+def test_translate_chunks_keeps_chunk_order(pool):
+    service = StandInService()
+    chunks = [f"chunk {i}" for i in range(20)]
+
+    result = translate_chunks(pool, chunks, lambda chunk: [service.translate(chunk)], backoff=0)
+
+    assert result == [[f"CHUNK {i}"] for i in range(20)]
+
+
+def test_translate_chunks_retries_only_the_failing_chunk(pool):
+    service = StandInService(failures={"chunk 3": 2})
+    chunks = [f"chunk {i}" for i in range(6)]
+
+    result = translate_chunks(pool, chunks, lambda chunk: [service.translate(chunk)], retries=3, backoff=0)
+
+    assert result == [[f"CHUNK {i}"] for i in range(6)]
+    assert service.requests.count("chunk 3") == 3
+    assert all(service.requests.count(f"chunk {i}") == 1 for i in range(6) if i != 3)
+
+
+def test_translate_chunks_fails_after_retries_run_out(pool):
+    service = StandInService(failures={"chunk 1": 10})
+    chunks = ["chunk 0", "chunk 1", "chunk 2"]
+
+    with pytest.raises(ConnectionError):
+        translate_chunks(pool, chunks, lambda chunk: [service.translate(chunk)], retries=2, backoff=0)
+    assert service.requests.count("chunk 1") == 3
+
+
+def test_translate_aligned_uses_one_request_when_lines_line_up():
+    service = StandInService()
+    sentences = [f"sentence {i}." for i in range(8)]
+
+    assert translate_aligned(service.translate, sentences) == [f"SENTENCE {i}." for i in range(8)]
+    assert len(service.requests) == 1
+
+
+def test_translate_aligned_bisects_a_merged_group():
+    service = StandInService(merge={"sentence 5."})
+    sentences = [f"sentence {i}." for i in range(16)]
+
+    assert translate_aligned(service.translate, sentences) == [f"SENTENCE {i}." for i in range(16)]
+    # Only the halves containing the merging sentence are split again, not every sentence
+    assert len(service.requests) < len(sentences)
+    assert "sentence 0.\nsentence 1.\nsentence 2.\nsentence 3." in service.requests
+
+
+def test_translate_aligned_joins_a_single_sentence_split_across_lines():
+    assert translate_aligned(lambda text: "first half\nsecond half", ["one sentence."]) == ["first half second half"]
@@ -0,0 +1,101 @@
+# transcript_cache.py
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TranscriptCache:
+    """On-disk LRU cache of transcripts keyed by YouTube video id and Whisper model name."""
+
+    def __init__(self, db_path: str, max_bytes: int = 512 * 1024 * 1024):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS transcripts (
+                video_id TEXT NOT NULL,
+                model TEXT NOT NULL,
+                source TEXT NOT NULL,
+                transcript TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                segments TEXT,
+                PRIMARY KEY (video_id, model)
+            )"""
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(transcripts)")}
+        if "segments" not in columns:
+            self._conn.execute("ALTER TABLE transcripts ADD COLUMN segments TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_transcripts_lru ON transcripts (last_access)")
+        self._conn.commit()
+
+    def get(self, video_id: str, model: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT transcript, source, segments FROM transcripts WHERE video_id = ? AND model = ?",
+                (video_id, model)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE transcripts SET last_access = ? WHERE video_id = ? AND model = ?",
+                (time.time(), video_id, model)
+            )
+            self._conn.commit()
+            self.hits += 1
+        return {"transcript": row[0], "source": row[1], "segments": json.loads(row[2]) if row[2] else []}
+
+    def put(self, video_id: str, model: str, transcript: str, source: str,
+            segments: Optional[List[Dict]] = None):
+        segments_json = json.dumps(segments) if segments else None
+        size = len(transcript.encode("utf-8")) + len(segments_json or "")
+        if size > self.max_bytes:
+            logger.warning(f"Transcript for {video_id} is larger than the whole cache, not caching it")
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO transcripts "
+                "(video_id, model, source, transcript, size, created_at, last_access, segments) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (video_id, model, source, transcript, size, now, now, segments_json)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM transcripts"
+            ).fetchone()
+        return {"entries": entries, "bytes": total, "hits": self.hits, "misses": self.misses}
+
+    def _evict(self):
+        # Drop least recently used transcripts until the cache fits its size budget
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM transcripts").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute(
+            "SELECT video_id, model, size FROM transcripts ORDER BY last_access ASC"
+        ).fetchall()
+        for video_id, model, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute(
+                "DELETE FROM transcripts WHERE video_id = ? AND model = ?", (video_id, model)
+            )
+            total -= size
+            logger.info(f"Evicted cached transcript for {video_id} ({model})")
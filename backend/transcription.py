@@ -0,0 +1,171 @@
+# transcription.py
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from audio import SAMPLE_RATE
+
+logger = logging.getLogger(__name__)
+
+# Carry the tail of the previous window into the next one so decoding keeps its context
+PROMPT_TAIL_CHARS = 200
+
+# Energy is measured over 30 ms frames and smoothed over ~300 ms when looking for pauses
+FRAME_SECONDS = 0.03
+SMOOTHING_FRAMES = 10
+
+# Shorter chunks give Whisper too little context to be worth a process round trip
+MIN_CHUNK_SECONDS = 1.0
+
+
+def caption_segments(transcript_list: List[Dict]) -> List[Dict]:
+    """Convert YouTube caption items into the same segment shape Whisper produces."""
+    segments = []
+    for item in transcript_list:
+        text = item["text"].strip()
+        if not text:
+            continue
+        start = float(item.get("start", 0.0))
+        segments.append({
+            "start": round(start, 2),
+            "end": round(start + float(item.get("duration", 0.0)), 2),
+            "text": text
+        })
+    return segments
+
+
+def whisper_segments(result: Dict, offset: float = 0.0) -> List[Dict]:
+    """Extract timestamped segments from a ``model.transcribe`` result, shifted by ``offset`` seconds."""
+    segments = []
+    for segment in result.get("segments", []):
+        text = segment["text"].strip()
+        if not text:
+            continue
+        segments.append({
+            "start": round(offset + segment["start"], 2),
+            "end": round(offset + segment["end"], 2),
+            "text": text
+        })
+    return segments
+
+
+def iter_whisper_segments(model, audio: np.ndarray, window_seconds: float = 30.0,
+                          lock=None) -> Iterator[Dict]:
+    """Transcribe 16 kHz PCM window by window, yielding each segment as soon as it is decoded.
+
+    ``lock``, if given, is held while each window decodes but not while segments are
+    consumed, so a slow reader does not keep other users of ``model`` waiting.
+    """
+    window = int(window_seconds * SAMPLE_RATE)
+    prompt: Optional[str] = None
+
+    for start in range(0, len(audio), window):
+        chunk = audio[start:start + window]
+        with lock or nullcontext():
+            result = model.transcribe(chunk, initial_prompt=prompt)
+        for segment in whisper_segments(result, offset=start / SAMPLE_RATE):
+            yield segment
+        prompt = result["text"][-PROMPT_TAIL_CHARS:].strip() or None
+
+
+def frame_energy(audio: np.ndarray, frame_length: int) -> np.ndarray:
+    """Mean signal power of consecutive non-overlapping frames."""
+    n_frames = len(audio) // frame_length
+    frames = audio[:n_frames * frame_length].reshape(n_frames, frame_length)
+    return np.einsum("ij,ij->i", frames, frames) / frame_length
+
+
+def silence_boundaries(audio: np.ndarray, chunk_seconds: float = 120.0,
+                       search_seconds: float = 10.0) -> List[Tuple[int, int]]:
+    """Split audio into roughly ``chunk_seconds`` long pieces, cutting at the quietest
+    point within ``search_seconds`` of each target boundary. Returns sample ranges.
+
+    The search window is capped at half a chunk, so every cut moves forward.
+    """
+    if chunk_seconds < MIN_CHUNK_SECONDS:
+        raise ValueError(f"chunk_seconds must be at least {MIN_CHUNK_SECONDS}, got {chunk_seconds}")
+    frame_length = int(FRAME_SECONDS * SAMPLE_RATE)
+    energy = frame_energy(audio, frame_length)
+    if len(energy) > SMOOTHING_FRAMES:
+        energy = np.convolve(energy, np.ones(SMOOTHING_FRAMES) / SMOOTHING_FRAMES, mode="same")
+
+    chunk_frames = int(chunk_seconds / FRAME_SECONDS)
+    search_frames = min(int(search_seconds / FRAME_SECONDS), chunk_frames // 2)
+    bounds = []
+    start = 0
+    while len(energy) - start > chunk_frames + search_frames:
+        target = start + chunk_frames
+        low, high = target - search_frames, target + search_frames
+        cut = low + int(np.argmin(energy[low:high]))
+        bounds.append((start * frame_length, cut * frame_length))
+        start = cut
+    bounds.append((start * frame_length, len(audio)))
+    return bounds
+
+
+# Each pool process holds its own copy of the model, loaded once by the initializer
+_worker_model = None
+
+
+def _init_worker(model_name: str, threads: int):
+    global _worker_model
+    import torch
+    import whisper
+    torch.set_num_threads(threads)
+    _worker_model = whisper.load_model(model_name)
+
+
+def _transcribe_chunk(chunk: np.ndarray, offset: float) -> List[Dict]:
+    result = _worker_model.transcribe(chunk)
+    return whisper_segments(result, offset=offset)
+
+
+class ParallelTranscriber:
+    """Transcribes silence-separated chunks of one recording in parallel across processes."""
+
+    def __init__(self, model_name: str, workers: int, chunk_seconds: float = 120.0):
+        if chunk_seconds < MIN_CHUNK_SECONDS:
+            raise ValueError(f"Whisper chunks must be at least {MIN_CHUNK_SECONDS} seconds, got {chunk_seconds}")
+        self.model_name = model_name
+        self.workers = workers
+        self.chunk_seconds = chunk_seconds
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            threads = max(1, (os.cpu_count() or 1) // self.workers)
+            logger.info(f"Starting {self.workers} Whisper worker processes ({threads} threads each)")
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.model_name, threads)
+            )
+        return self._executor
+
+    def transcribe(self, audio: np.ndarray) -> Dict:
+        bounds = silence_boundaries(audio, chunk_seconds=self.chunk_seconds)
+        logger.info(f"Split audio into {len(bounds)} chunks at silence boundaries")
+
+        pool = self._pool()
+        futures = [
+            pool.submit(_transcribe_chunk, audio[start:end], start / SAMPLE_RATE)
+            for start, end in bounds
+        ]
+        # Futures are kept in chunk order, so the stitched segments stay in time order
+        segments = [segment for future in futures for segment in future.result()]
+        return {
+            "text": " ".join(segment["text"] for segment in segments),
+            "segments": segments,
+            "chunks": len(bounds)
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,170 @@
+# translation.py
+import logging
+import os
+import time
+from concurrent.futures import Executor
+from typing import Callable, List, Optional, TypeVar
+
+from translation_memory import normalize_sentence
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+NLLB_BACKENDS = ("fp32", "int8", "ct2")
+
+
+class CTranslate2NLLB:
+    """An NLLB model exported to CTranslate2 (e.g. with ``ct2-transformers-converter
+    --quantization int8``), exposing the batch step used by ``translate_batched``."""
+
+    def __init__(self, model_dir: str, compute_type: str = "int8", threads: int = 0):
+        import ctranslate2
+        self.translator = ctranslate2.Translator(
+            model_dir, device="cpu", compute_type=compute_type, intra_threads=threads
+        )
+
+    def translate_batch(self, tokenizer, sentences: List[str], target_lang: str,
+                        max_length: int = 512) -> List[str]:
+        source = [tokenizer.convert_ids_to_tokens(tokenizer.encode(s, truncation=True)) for s in sentences]
+        results = self.translator.translate_batch(
+            source,
+            target_prefix=[[target_lang]] * len(source),
+            max_batch_size=len(source),
+            max_decoding_length=max_length
+        )
+        # Each hypothesis starts with the forced target language token
+        return [
+            tokenizer.decode(tokenizer.convert_tokens_to_ids(result.hypotheses[0][1:]), skip_special_tokens=True)
+            for result in results
+        ]
+
+
+def load_nllb(model_name: str, backend: str = "fp32", ct2_dir: Optional[str] = None):
+    """Load the NLLB tokenizer and model for the selected CPU inference backend.
+
+    ``fp32`` is the plain Hugging Face model, ``int8`` applies PyTorch dynamic quantization
+    to its linear layers and ``ct2`` loads an int8 CTranslate2 export from ``ct2_dir``.
+    """
+    from transformers import AutoTokenizer
+
+    if backend not in NLLB_BACKENDS:
+        raise ValueError(f"Unknown NLLB backend '{backend}', expected one of {', '.join(NLLB_BACKENDS)}")
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    if backend == "ct2":
+        if not ct2_dir or not os.path.isdir(ct2_dir):
+            raise FileNotFoundError(f"CTranslate2 NLLB model not found at {ct2_dir}")
+        return tokenizer, CTranslate2NLLB(ct2_dir)
+
+    import torch
+    from transformers import AutoModelForSeq2SeqLM
+
+    model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
+    model.eval()
+    if backend == "int8":
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return tokenizer, model
+
+
+def _generate_batch(tokenizer, model, sentences: List[str], target_lang: str, max_length: int) -> List[str]:
+    import torch
+
+    encoded = tokenizer(sentences, return_tensors="pt", padding=True, truncation=True)
+    with torch.inference_mode():
+        generated_tokens = model.generate(
+            **encoded,
+            forced_bos_token_id=tokenizer.convert_tokens_to_ids(target_lang),
+            max_length=max_length
+        )
+    return tokenizer.batch_decode(generated_tokens, skip_special_tokens=True)
+
+
+def translate_batched(tokenizer, model, sentences: List[str], target_lang: str,
+                      source_lang: str = "eng_Latn", batch_size: int = 16,
+                      max_length: int = 512) -> List[str]:
+    """Translate sentences with NLLB in padded batches, returning them in input order.
+
+    Sentences are bucketed by token length so each batch carries as little padding as possible.
+    """
+    if not sentences:
+        return []
+
+    tokenizer.src_lang = source_lang
+    lengths = [len(ids) for ids in tokenizer(sentences, truncation=True)["input_ids"]]
+    order = sorted(range(len(sentences)), key=lambda i: lengths[i])
+
+    translated: List[str] = [""] * len(sentences)
+    for start in range(0, len(order), batch_size):
+        batch = order[start:start + batch_size]
+        batch_sentences = [sentences[i] for i in batch]
+        if isinstance(model, CTranslate2NLLB):
+            outputs = model.translate_batch(tokenizer, batch_sentences, target_lang, max_length)
+        else:
+            outputs = _generate_batch(tokenizer, model, batch_sentences, target_lang, max_length)
+        for i, text in zip(batch, outputs):
+            translated[i] = text
+
+    return translated
+
+
+def translate_with_memory(memory, sentences: List[str], target_language: str, method: str,
+                          translate_fn: Callable[[List[str]], List[str]]) -> List[str]:
+    """Serve sentences from the translation memory and send only the misses to ``translate_fn``."""
+    found = memory.lookup_many(sentences, target_language, method)
+    misses = []
+    pending = set()
+    for sentence in sentences:
+        key = normalize_sentence(sentence)
+        if key not in found and key not in pending:
+            pending.add(key)
+            misses.append(key)
+
+    if misses:
+        logger.info(f"Translation memory: {len(sentences) - len(misses)} sentences cached, {len(misses)} to translate")
+        translated = dict(zip(misses, translate_fn(misses)))
+        memory.store_many(translated, target_language, method)
+        found.update(translated)
+
+    return [found[normalize_sentence(sentence)] for sentence in sentences]
+
+
+def translate_chunks(executor: Executor, chunks: List[T], translate_chunk: Callable[[T], List[str]],
+                     retries: int = 3, backoff: float = 0.5) -> List[List[str]]:
+    """Translate chunks concurrently on ``executor``, retrying each chunk on its own.
+
+    Results come back in chunk order. Only a chunk that still fails after ``retries``
+    retries fails the whole call.
+    """
+    def run(chunk: T) -> List[str]:
+        for attempt in range(retries + 1):
+            try:
+                return translate_chunk(chunk)
+            except Exception as e:
+                if attempt == retries:
+                    raise
+                delay = backoff * 2 ** attempt
+                logger.warning(f"Chunk translation failed ({str(e)}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    if len(chunks) == 1:
+        return [run(chunks[0])]
+    futures = [executor.submit(run, chunk) for chunk in chunks]
+    return [future.result() for future in futures]
+
+
+def translate_aligned(translate_text: Callable[[str], str], sentences: List[str]) -> List[str]:
+    """Translate sentences as one newline-joined request, returning one line per sentence.
+
+    Services sometimes merge or split lines. When the line count no longer matches, each
+    half is retried on its own, so a misaligned group costs about log2(n) extra requests
+    rather than one request per sentence.
+    """
+    if len(sentences) == 1:
+        return [" ".join(line.strip() for line in translate_text(sentences[0]).split("\n") if line.strip())]
+    lines = [line.strip() for line in translate_text("\n".join(sentences)).split("\n") if line.strip()]
+    if len(lines) == len(sentences):
+        return lines
+    middle = len(sentences) // 2
+    return translate_aligned(translate_text, sentences[:middle]) + translate_aligned(translate_text, sentences[middle:])
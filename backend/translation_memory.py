@@ -0,0 +1,107 @@
+# translation_memory.py
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_sentence(sentence: str) -> str:
+    """Canonical form used as the memory key: NFC, collapsed whitespace, trimmed."""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", sentence)).strip()
+
+
+class TranslationMemory:
+    """On-disk LRU store of sentence translations keyed by (sentence, target language, method)."""
+
+    def __init__(self, db_path: str, max_entries: int = 200000):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS translations (
+                source TEXT NOT NULL,
+                target_language TEXT NOT NULL,
+                method TEXT NOT NULL,
+                translation TEXT NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (source, target_language, method)
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_translations_lru ON translations (last_access)")
+        self._conn.commit()
+
+    def lookup_many(self, sentences: List[str], target_language: str, method: str) -> Dict[str, str]:
+        """Return the stored translations for the normalized sentences that are in memory."""
+        keys = list({normalize_sentence(sentence) for sentence in sentences})
+        found: Dict[str, str] = {}
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT source, translation FROM translations "
+                    f"WHERE target_language = ? AND method = ? AND source IN ({placeholders})",
+                    [target_language, method, *batch]
+                ).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE translations SET last_access = ? "
+                    "WHERE source = ? AND target_language = ? AND method = ?",
+                    [(now, source, target_language, method) for source in found]
+                )
+                self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def store_many(self, translations: Dict[str, str], target_language: str, method: str):
+        if not translations:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?)",
+                [
+                    (normalize_sentence(source), target_language, method, translation, now)
+                    for source, translation in translations.items()
+                ]
+            )
+            self._evict()
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+    def _evict(self):
+        # Drop the least recently used sentences once the memory grows past its bound
+        entries = self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        excess = entries - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM translations WHERE rowid IN "
+                "(SELECT rowid FROM translations ORDER BY last_access ASC LIMIT ?)",
+                (excess,)
+            )
+            logger.info(f"Evicted {excess} sentences from the translation memory")
@@ -0,0 +1,128 @@
+# uploads.py
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Iterable
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_CHUNK_BYTES = 1 << 20
+
+
+class UploadTooLargeError(Exception):
+    """Raised when an upload exceeds the configured size limit."""
+
+
+@asynccontextmanager
+async def stored_upload(file, dest_dir: str, max_bytes: int, suffix: str = ".pdf") -> AsyncIterator[Dict]:
+    """Stream an ``UploadFile`` to a temporary file in fixed-size chunks, hashing as it goes.
+
+    Yields ``{"path", "sha256", "size", "seconds"}``. The file is removed when the block exits, and
+    writing stops as soon as the upload grows past ``max_bytes``.
+    """
+    os.makedirs(dest_dir, exist_ok=True)
+    fd, path = tempfile.mkstemp(suffix=suffix, dir=dest_dir)
+    start = time.perf_counter()
+    try:
+        digest = hashlib.sha256()
+        size = 0
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_BYTES)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLargeError(f"Upload exceeds the {max_bytes // (1024 * 1024)} MB limit")
+                digest.update(chunk)
+                out.write(chunk)
+        logger.info(f"Stored upload of {size} bytes at {path}")
+        yield {"path": path, "sha256": digest.hexdigest(), "size": size, "seconds": time.perf_counter() - start}
+    finally:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+class UploadLimitMiddleware:
+    """ASGI middleware that rejects request bodies over ``max_bytes`` on ``paths`` with 413.
+
+    FastAPI parses a multipart body in full before the endpoint runs. So the limit is
+    enforced here, on the raw body as it arrives: a too-large Content-Length is refused
+    before any of the body is read, and a body that grows past the limit is cut off
+    by ending it with a disconnect.
+    """
+
+    def __init__(self, app, max_bytes: int, paths: Iterable[str]):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope["headers"]:
+            if name == b"content-length" and value.isdigit() and int(value) > self.max_bytes:
+                await self._reject(send)
+                return
+
+        received = 0
+        too_large = False
+        rejected = False
+
+        async def limited_receive():
+            nonlocal received, too_large
+            if too_large:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    too_large = True
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def limited_send(message):
+            nonlocal rejected
+            # Whatever the app answers to the cut-off body is replaced by one 413
+            if too_large:
+                if not rejected:
+                    rejected = True
+                    await self._reject(send)
+                return
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, limited_send)
+        except Exception:
+            if not too_large:
+                raise
+        if too_large and not rejected:
+            await self._reject(send)
+
+    async def _reject(self, send):
+        body = json.dumps({"detail": f"Upload exceeds the {self.max_bytes // (1024 * 1024)} MB limit"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def remove_stale_uploads(dest_dir: str, max_age_seconds: float = 3600):
+    """Delete upload files left behind by a crashed or killed worker."""
+    if not os.path.isdir(dest_dir):
+        return
+    cutoff = time.time() - max_age_seconds
+    for entry in os.scandir(dest_dir):
+        if entry.is_file() and entry.stat().st_mtime < cutoff:
+            os.remove(entry.path)
+            logger.info(f"Removed stale upload {entry.path}")
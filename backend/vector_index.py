@@ -0,0 +1,92 @@
+# vector_index.py
+import hashlib
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+
+from langchain_community.vectorstores import FAISS
+
+logger = logging.getLogger(__name__)
+
+LAST_ACCESS_FILE = ".last_access"
+
+
+class VectorIndexStore:
+    """Per-document FAISS indexes on disk, addressed by document content hash and embedding model.
+
+    The same paper always maps to the same index, so re-uploads skip embedding, while
+    different papers can never share one. Least recently used indexes are deleted once
+    the store grows past ``max_bytes``.
+    """
+
+    def __init__(self, root_dir: str, max_bytes: int = 2 * 1024 * 1024 * 1024):
+        self.root_dir = root_dir
+        self.max_bytes = max_bytes
+        os.makedirs(root_dir, exist_ok=True)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def index_key(content_hash: str, embedding_model: str) -> str:
+        return hashlib.sha256(f"{content_hash}:{embedding_model}".encode("utf-8")).hexdigest()
+
+    def index_dir(self, content_hash: str, embedding_model: str) -> str:
+        return os.path.join(self.root_dir, self.index_key(content_hash, embedding_model))
+
+    def load_or_build(self, content_hash: str, docs, embeddings, embedding_model: str) -> FAISS:
+        index_dir = self.index_dir(content_hash, embedding_model)
+        if os.path.exists(os.path.join(index_dir, "index.faiss")):
+            logger.info(f"Reusing vector index {os.path.basename(index_dir)}")
+            vectorstore = FAISS.load_local(index_dir, embeddings, allow_dangerous_deserialization=True)
+            self._touch(index_dir)
+            return vectorstore
+
+        logger.info(f"Building vector index for {len(docs)} chunks")
+        vectorstore = FAISS.from_documents(docs, embeddings)
+        # Save next to the final location and rename, so a crash never leaves a half-written index
+        staging_dir = f"{index_dir}.{uuid.uuid4().hex}.tmp"
+        vectorstore.save_local(staging_dir)
+        self._touch(staging_dir)
+        try:
+            os.replace(staging_dir, index_dir)
+        except OSError:
+            # Another request built the same index first
+            shutil.rmtree(staging_dir, ignore_errors=True)
+        self.evict(keep=index_dir)
+        return vectorstore
+
+    def evict(self, keep: str = None):
+        """Delete least recently used indexes until the store fits in ``max_bytes``."""
+        with self._lock:
+            indexes = []
+            total = 0
+            for name in os.listdir(self.root_dir):
+                path = os.path.join(self.root_dir, name)
+                if not os.path.isdir(path) or name.endswith(".tmp"):
+                    continue
+                size = sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+                indexes.append((self._last_access(path), path, size))
+                total += size
+
+            for _, path, size in sorted(indexes):
+                if total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                shutil.rmtree(path, ignore_errors=True)
+                total -= size
+                logger.info(f"Evicted cold vector index {os.path.basename(path)}")
+
+    @staticmethod
+    def _touch(index_dir: str):
+        with open(os.path.join(index_dir, LAST_ACCESS_FILE), "w") as marker:
+            marker.write(str(time.time()))
+
+    @staticmethod
+    def _last_access(index_dir: str) -> float:
+        try:
+            return os.path.getmtime(os.path.join(index_dir, LAST_ACCESS_FILE))
+        except OSError:
+            return 0.0
@@ -124,7 +124,13 @@ const Transcription = () => {
     setLoading(true);
     setTranscript('');
     try {
-      const res = await axios.post('http://127.0.0.1:8000/transcribe', { url });
+      const job = await axios.post('http://127.0.0.1:8000/transcribe', { url });
+      const jobId = job.data.job_id;
+      let res = await axios.get(`http://127.0.0.1:8000/transcribe/jobs/${jobId}/result`);
+      while (res.status === 202) {
+        await new Promise((resolve) => setTimeout(resolve, 2000));
+        res = await axios.get(`http://127.0.0.1:8000/transcribe/jobs/${jobId}/result`);
+      }
       if (res.data.transcript) {
         setTranscript(res.data.transcript);
         setSource(res.data.source);